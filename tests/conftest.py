@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Les modules de vf/ s'importent à plat (from tracker import ...), comme dans l'application
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "vf"))
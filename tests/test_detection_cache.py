@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from detection_cache import CHUNK_FRAMES, DetectionCache
+
+@pytest.fixture
+def files(tmp_path):
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"video" * 1000)
+    weights = tmp_path / "weights.pt"
+    weights.write_bytes(b"weights" * 1000)
+    return str(video), str(weights)
+
+def detections(frame_index):
+    # Nombre de boîtes variable, frames vides comprises (tableaux (0, 6))
+    count = frame_index % 4
+    rows = np.arange(count * 6, dtype=np.float32).reshape(count, 6) + frame_index
+    return rows
+
+def test_round_trip_including_empty_frames(tmp_path, files):
+    cache = DetectionCache(str(tmp_path / "cache"))
+    frames = CHUNK_FRAMES + 10
+
+    session = cache.session(*files, 640)
+    for i in range(frames):
+        session.put(i, detections(i))
+    session.close()
+
+    session = cache.session(*files, 640)
+    for i in range(frames):
+        cached = session.get(i)
+        assert cached is not None
+        assert cached.dtype == np.float32
+        assert cached.shape == (i % 4, 6)
+        np.testing.assert_array_equal(cached, detections(i))
+    assert session.get(frames) is None
+    assert cache.hits == frames
+
+def test_empty_frame_is_a_hit_not_a_miss(tmp_path, files):
+    cache = DetectionCache(str(tmp_path / "cache"))
+    session = cache.session(*files, 640)
+    session.put(0, np.zeros((0, 6), dtype=np.float32))
+    session.close()
+
+    cached = cache.session(*files, 640).get(0)
+    assert cached is not None and cached.shape == (0, 6)
+
+def test_key_depends_on_settings(tmp_path, files):
+    cache = DetectionCache(str(tmp_path / "cache"))
+    session = cache.session(*files, 640, "a")
+    session.put(0, detections(1))
+    session.close()
+
+    assert cache.session(*files, 640, "a").get(0) is not None
+    assert cache.session(*files, 320, "a").get(0) is None
+    assert cache.session(*files, 640, "b").get(0) is None
+
+def test_interrupted_session_is_completed(tmp_path, files):
+    cache = DetectionCache(str(tmp_path / "cache"))
+    session = cache.session(*files, 640)
+    for i in range(10):
+        session.put(i, detections(i))
+    session.close()
+
+    session = cache.session(*files, 640)
+    for i in range(10, 20):
+        session.put(i, detections(i))
+    session.close()
+
+    session = cache.session(*files, 640)
+    for i in range(20):
+        np.testing.assert_array_equal(session.get(i), detections(i))
+
+def test_session_starting_mid_chunk_is_persisted(tmp_path, files):
+    # Tranche ou pré-lecture commencée au milieu d'un bloc
+    cache = DetectionCache(str(tmp_path / "cache"))
+    session = cache.session(*files, 640)
+    for i in range(100, 200):
+        session.put(i, detections(i))
+    session.close()
+
+    session = cache.session(*files, 640)
+    assert session.get(99) is None
+    for i in range(100, 200):
+        np.testing.assert_array_equal(session.get(i), detections(i))
+    assert session.get(200) is None
+
+def test_shards_sharing_a_chunk_keep_both_ranges(tmp_path, files):
+    cache = DetectionCache(str(tmp_path / "cache"))
+    first = cache.session(*files, 640)
+    second = cache.session(*files, 640)
+    for i in range(0, 100):
+        first.put(i, detections(i))
+    for i in range(100, 180):
+        second.put(i, detections(i))
+    second.close()
+    first.close()
+
+    session = cache.session(*files, 640)
+    for i in range(180):
+        np.testing.assert_array_equal(session.get(i), detections(i))
@@ -0,0 +1,62 @@
+import json
+
+import analyze
+
+class ListWriter:
+    def __init__(self):
+        self.records = []
+
+    def write(self, record):
+        self.records.append(record)
+
+def write_part(path, video, frames):
+    with open(path, "w", encoding="utf-8") as f:
+        for frame in frames:
+            f.write(json.dumps({"video": video, "frame": frame, "detections": []}) + "\n")
+    return str(path)
+
+def test_parts_are_merged_in_task_order(tmp_path):
+    parts = [
+        write_part(tmp_path / "0.jsonl", "a.mp4", range(0, 5)),
+        write_part(tmp_path / "1.jsonl", "a.mp4", range(5, 10)),
+        write_part(tmp_path / "2.jsonl", "b.mp4", range(0, 3))
+    ]
+    writer = ListWriter()
+    analyze.merge_parts(parts, writer)
+
+    assert [(r["video"], r["frame"]) for r in writer.records] == (
+        [("a.mp4", i) for i in range(10)] + [("b.mp4", i) for i in range(3)]
+    )
+
+def test_shard_overlap_is_not_duplicated(tmp_path):
+    # Une tranche démarrée sur l'image clé précédente recouvre la fin de la tranche d'avant
+    parts = [
+        write_part(tmp_path / "0.jsonl", "a.mp4", range(0, 6)),
+        write_part(tmp_path / "1.jsonl", "a.mp4", range(4, 10))
+    ]
+    writer = ListWriter()
+    analyze.merge_parts(parts, writer)
+
+    assert [r["frame"] for r in writer.records] == list(range(10))
+
+def test_missing_frames_are_reported(tmp_path, capsys):
+    parts = [
+        write_part(tmp_path / "0.jsonl", "a.mp4", range(0, 4)),
+        str(tmp_path / "absent.jsonl"),
+        write_part(tmp_path / "2.jsonl", "a.mp4", range(6, 8))
+    ]
+    writer = ListWriter()
+    analyze.merge_parts(parts, writer)
+
+    assert [r["frame"] for r in writer.records] == [0, 1, 2, 3, 6, 7]
+    assert "frames 4-5 absentes pour a.mp4" in capsys.readouterr().err
+
+def test_plan_tasks_covers_every_frame():
+    infos = {"a.mp4": {"frames": 101}, "b.mp4": {"frames": 3}}
+    tasks = analyze.plan_tasks(["a.mp4", "b.mp4"], infos, 4)
+
+    shards = [t for t in tasks if t[0] == "a.mp4"]
+    assert [start for _, start, _ in shards] == [0, 25, 50, 76]
+    assert [end for _, _, end in shards] == [25, 50, 76, None]
+    # Fichier trop court pour être découpé
+    assert [t for t in tasks if t[0] == "b.mp4"] == [("b.mp4", 0, None)]
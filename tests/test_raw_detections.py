@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+import torch
+
+import yolo_processor
+from detection_cache import DetectionCache
+from fast_predictor import FastPredictor
+
+class FixedBackend:
+    # Réseau factice: mêmes sorties brutes pour toute image, confiances toutes distinctes
+    # (pas d'ex aequo, l'ordre après NMS est déterministe)
+    stride = 32
+    name = "test"
+    precision = "fp32"
+
+    def __init__(self, anchors=120, classes=80, seed=0):
+        rng = np.random.default_rng(seed)
+        preds = np.zeros((1, 4 + classes, anchors), dtype=np.float32)
+        # Chaque objet est vu par trois ancres voisines: la NMS doit en supprimer deux
+        objects = anchors // 3
+        preds[0, 0] = np.repeat(rng.uniform(8, 56, objects), 3) + rng.uniform(-1, 1, anchors)
+        preds[0, 1] = np.repeat(rng.uniform(8, 40, objects), 3) + rng.uniform(-1, 1, anchors)
+        preds[0, 2:4] = np.repeat(rng.uniform(6, 20, (2, objects)), 3, axis=1)
+        labels = np.repeat(rng.choice([0, 2, 5, 16], objects), 3)
+        preds[0, 4 + labels, np.arange(anchors)] = rng.permutation(np.linspace(0.02, 0.98, anchors))
+        self.preds = torch.from_numpy(preds)
+
+    def __call__(self, batch):
+        return self.preds.repeat(len(batch), 1, 1)
+
+@pytest.fixture
+def predictor():
+    return FastPredictor(FixedBackend(), imgsz=64, iou=yolo_processor.NMS_IOU_THRESHOLD)
+
+@pytest.fixture
+def cache_session(tmp_path):
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"video" * 1000)
+    weights = tmp_path / "weights.pt"
+    weights.write_bytes(b"weights" * 1000)
+    return DetectionCache(str(tmp_path / "cache")).session(str(video), str(weights), 64)
+
+@pytest.mark.parametrize("object_ids", [None, [0, 2]])
+@pytest.mark.parametrize("threshold", [yolo_processor.RAW_CONFIDENCE_FLOOR, 0.25, 0.5, 0.8])
+def test_cached_raw_detections_match_direct_prediction(predictor, cache_session, object_ids, threshold):
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+    raw = predictor(
+        [frame], conf=yolo_processor.RAW_CONFIDENCE_FLOOR, max_det=yolo_processor.RAW_MAX_DETECTIONS
+    )[0]
+    cache_session.put(0, raw)
+    cache_session.close()
+    cached = cache_session.get(0)
+
+    filtered = yolo_processor.select_detections(cached, object_ids, conf=threshold)
+    direct = predictor([frame], classes=object_ids, conf=threshold, max_det=yolo_processor.MAX_DETECTIONS)[0]
+
+    assert len(direct)
+    np.testing.assert_array_equal(filtered, direct)
@@ -0,0 +1,82 @@
+import numpy as np
+
+from tracker import ByteTracker
+
+def box(cx, cy, size=40):
+    half = size / 2
+    return [cx - half, cy - half, cx + half, cy + half]
+
+def nearest_id(tracker, cx, cy):
+    tracks = tracker.active_tracks()
+    centers = np.array([[(b[0] + b[2]) / 2, (b[1] + b[3]) / 2] for _, _, b, _ in tracks])
+    return tracks[int(np.argmin(np.hypot(centers[:, 0] - cx, centers[:, 1] - cy)))][0]
+
+def test_single_object_keeps_its_id():
+    tracker = ByteTracker(min_hits=3)
+    confirmed = []
+    for i in range(20):
+        confirmed += tracker.update([box(50 + 5 * i, 100)], [0], [0.9])
+
+    assert confirmed == [(1, 0)]
+    assert [t[0] for t in tracker.active_tracks()] == [1]
+    assert tracker.total_confirmed == 1
+
+def test_candidate_is_not_confirmed_before_min_hits():
+    tracker = ByteTracker(min_hits=3)
+    assert tracker.update([box(100, 100)], [0], [0.9]) == []
+    assert tracker.update([box(102, 100)], [0], [0.9]) == []
+    assert tracker.active_tracks() == []
+    assert tracker.update([box(104, 100)], [0], [0.9]) == [(1, 0)]
+
+def test_ids_survive_a_crossing():
+    # Deux objets de même classe qui se croisent: la vitesse du filtre de Kalman
+    # doit garder chaque identifiant sur sa trajectoire
+    tracker = ByteTracker(min_hits=3)
+    for i in range(40):
+        left_x, right_x = 20 + 10 * i, 420 - 10 * i
+        tracker.update([box(left_x, 100), box(right_x, 106)], [0, 0], [0.9, 0.9])
+        if i == 5:
+            left_id = nearest_id(tracker, left_x, 100)
+            right_id = nearest_id(tracker, right_x, 106)
+
+    assert left_id != right_id
+    # Après le croisement l'objet parti de gauche est à droite, et inversement
+    assert nearest_id(tracker, 20 + 10 * 39, 100) == left_id
+    assert nearest_id(tracker, 420 - 10 * 39, 106) == right_id
+    assert tracker.total_confirmed == 2
+
+def test_weak_detection_keeps_track_alive():
+    tracker = ByteTracker(min_hits=1)
+    tracker.update([box(100, 100)], [0], [0.9])
+    # Objet partiellement masqué: confiance sous high_thresh mais au-dessus de low_thresh
+    tracker.update([box(103, 100)], [0], [0.2])
+    tracker.update([box(106, 100)], [0], [0.9])
+
+    assert [t[0] for t in tracker.active_tracks()] == [1]
+    assert tracker.total_confirmed == 1
+
+def test_reduced_detection_frequency():
+    # Une détection toutes les 4 frames: la prédiction avance de frames_elapsed
+    tracker = ByteTracker(min_hits=3)
+    for i in range(10):
+        tracker.update([box(50 + 2 * 4 * i, 100)], [0], [0.9], frames_elapsed=4)
+
+    assert [t[0] for t in tracker.active_tracks()] == [1]
+    assert tracker.total_confirmed == 1
+
+def test_class_change_starts_a_new_track():
+    tracker = ByteTracker(min_hits=1)
+    tracker.update([box(100, 100)], [0], [0.9])
+    confirmed = tracker.update([box(100, 100)], [2], [0.9])
+
+    assert confirmed == [(2, 2)]
+    assert [t[0] for t in tracker.active_tracks()] == [2]
+
+def test_lost_track_is_dropped_after_max_age():
+    tracker = ByteTracker(min_hits=1, max_age=5)
+    tracker.update([box(100, 100)], [0], [0.9])
+    for _ in range(6):
+        tracker.update(np.zeros((0, 4)), [], [])
+    confirmed = tracker.update([box(100, 100)], [0], [0.9])
+
+    assert confirmed == [(2, 0)]
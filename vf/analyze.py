@@ -0,0 +1,475 @@
+"""
+Analyse hors interface de fichiers vidéo (à lancer depuis le dossier vf/)
+
+    python analyze.py video1.mp4 video2.mp4 -o detections.jsonl
+    python analyze.py video.mp4 -o detections.parquet --objects person cup
+    python analyze.py enregistrements/*.mp4 -o detections.jsonl --workers 4
+    python analyze.py longue_video.mp4 -o detections.jsonl --workers 8 --shards 8
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+import yolo_processor
+from coco_classes import COCO_CLASSES, COCO_NAME_TO_ID
+from log_utils import setup_logging
+from pipeline import VideoPipeline, StageQueue, BatchSizeTuner, BLOCK, END_OF_STREAM
+from yolo_processor import detect_objects_batch, get_predictor, BOX_CONF, BOX_CLS
+
+class UnreadableVideoError(Exception):
+    pass
+
+class AnalysisError(Exception):
+    pass
+
+def iter_detections(video_path, object_ids=None, batch_size="auto", start_frame=0, end_frame=None, preroll=0):
+    # Produit (index de frame, détections (N, 6)) dans l'ordre, sans dessin ni affichage
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise UnreadableVideoError(f"Impossible d'ouvrir la source vidéo: {video_path}")
+
+    index = [0]
+    if start_frame:
+        # On se place un peu avant le début demandé: le décodeur repart d'une image clé
+        # et les frames de pré-roulement sont décodées sans être analysées
+        cap.set(cv2.CAP_PROP_POS_FRAMES, max(0, start_frame - preroll))
+        position = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+        if position < 0 or position > start_frame:
+            print(f"Positionnement imprécis dans {video_path}, décodage depuis le début")
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            position = 0
+        index[0] = position
+
+    # Cache des détections partagé avec l'interface (mêmes clés: vidéo, poids, taille)
+    cache_session = None
+    if yolo_processor.detection_cache_applies():
+        try:
+            cache_session = yolo_processor.get_detection_cache().session(
+                video_path, yolo_processor.resolve_weights(yolo_processor.MODEL_PATH), yolo_processor.IMAGE_SIZE, yolo_processor.detection_cache_signature()
+            )
+        except OSError as e:
+            print(f"Cache de détections indisponible: {e}")
+
+    stopped = threading.Event()
+
+    if batch_size == "auto":
+        batch_size = BatchSizeTuner(max_size=yolo_processor.MAX_BATCH_SIZE)
+    else:
+        batch_size = (lambda size: lambda: size)(int(batch_size))
+
+    def capture_stage(_):
+        while True:
+            if end_frame is not None and index[0] >= end_frame:
+                return END_OF_STREAM
+            ret, frame = cap.read()
+            if not ret:
+                return END_OF_STREAM
+            index[0] += 1
+            if index[0] - 1 >= start_frame:
+                return index[0] - 1, frame
+
+    def inference_stage(items):
+        start = time.perf_counter()
+        outputs = detect_objects_batch(
+            [frame for _, frame in items],
+            object_ids=object_ids,
+            cache_session=cache_session,
+            frame_indices=[frame_index for frame_index, _ in items],
+            strict=True
+        )
+        if isinstance(batch_size, BatchSizeTuner):
+            batch_size.record(len(items), time.perf_counter() - start)
+        return [(frame_index, detections) for (frame_index, _), (detections, _, _) in zip(items, outputs)]
+
+    pipeline = VideoPipeline(stopped.is_set)
+    pipeline.add_stage("capture", capture_stage, StageQueue("capture", maxsize=2 * yolo_processor.MAX_BATCH_SIZE, policy=BLOCK))
+    pipeline.add_stage("inference", inference_stage, StageQueue("sortie", maxsize=2 * yolo_processor.MAX_BATCH_SIZE, policy=BLOCK), batch_size=batch_size)
+    output = pipeline.queues[-1]
+
+    pipeline.start()
+    try:
+        while True:
+            item = output.get(stopped.is_set)
+            if item is END_OF_STREAM:
+                break
+            yield item
+
+        # Un étage arrêté par une erreur termine aussi le flux: ce n'est pas une fin de fichier
+        failure = pipeline.error()
+        if failure is not None:
+            name, error = failure
+            raise AnalysisError(f"Échec de l'analyse de {video_path} (étage {name}): {error}") from error
+    finally:
+        stopped.set()
+        pipeline.join()
+        cap.release()
+        if cache_session is not None:
+            cache_session.close()
+
+def detection_record(video_path, frame_index, source_fps, detections):
+    return {
+        "video": video_path,
+        "frame": frame_index,
+        "time": round(frame_index / source_fps, 3) if source_fps else None,
+        "detections": [
+            {
+                "class": COCO_CLASSES.get(int(cls), str(int(cls))),
+                "class_id": int(cls),
+                "confidence": round(float(conf), 4),
+                "box": [round(float(v), 1) for v in box]
+            }
+            for box, conf, cls in zip(detections[:, :4], detections[:, BOX_CONF], detections[:, BOX_CLS])
+        ]
+    }
+
+class JsonlWriter:
+    def __init__(self, path):
+        self.file = open(path, "w", encoding="utf-8")
+
+    def write(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.file.close()
+
+class ParquetWriter:
+    # Écriture par groupes de lignes pour ne pas garder toute la vidéo en mémoire
+    def __init__(self, path, row_group_size=1000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("La sortie Parquet nécessite pyarrow (pip install pyarrow)")
+        self.pa = pa
+        self.pq = pq
+        # Schéma explicite: un premier groupe sans aucune détection ne fixe pas le type
+        self.schema = pa.schema([
+            ("video", pa.string()),
+            ("frame", pa.int64()),
+            ("time", pa.float64()),
+            ("detections", pa.list_(pa.struct([
+                ("class", pa.string()),
+                ("class_id", pa.int32()),
+                ("confidence", pa.float32()),
+                ("box", pa.list_(pa.float32(), 4))
+            ])))
+        ])
+        self.path = path
+        self.row_group_size = row_group_size
+        self.rows = []
+        self.writer = None
+
+    def write(self, record):
+        self.rows.append(record)
+        if len(self.rows) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if not self.rows:
+            return
+        table = self.pa.Table.from_pylist(self.rows, schema=self.schema)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, self.schema)
+        self.writer.write_table(table)
+        self.rows = []
+
+    def close(self):
+        self._flush()
+        if self.writer is not None:
+            self.writer.close()
+
+def open_writer(path):
+    if path.endswith(".parquet"):
+        return ParquetWriter(path)
+    return JsonlWriter(path)
+
+def video_info(video_path):
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return None
+    info = {
+        "fps": cap.get(cv2.CAP_PROP_FPS) or 0.0,
+        "frames": int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    }
+    cap.release()
+    return info
+
+# Mémoire estimée d'un processus d'analyse (runtime torch, poids yolov8m, tampons de lots)
+WORKER_MEMORY_MB = 1200
+PROGRESS_EVERY = 25
+PROGRESS_INTERVAL = 2.0
+
+PREROLL_SECONDS = 2.0  # Couvre l'intervalle entre images clés des encodages courants
+
+def analyze_file(video_path, writer, object_ids=None, batch_size="auto", progress=None, start_frame=0, end_frame=None):
+    info = video_info(video_path)
+    if info is None:
+        raise UnreadableVideoError(f"Impossible d'ouvrir la source vidéo: {video_path}")
+
+    preroll = int(PREROLL_SECONDS * (info["fps"] or 30))
+    frames = 0
+    for frame_index, detections in iter_detections(video_path, object_ids, batch_size, start_frame, end_frame, preroll):
+        writer.write(detection_record(video_path, frame_index, info["fps"], detections))
+        frames += 1
+        if progress and frames % PROGRESS_EVERY == 0:
+            progress(PROGRESS_EVERY)
+
+    if progress and frames % PROGRESS_EVERY:
+        progress(frames % PROGRESS_EVERY)
+
+    if frames == 0 and start_frame == 0:
+        raise UnreadableVideoError(f"Aucune frame lisible dans: {video_path}")
+    return frames, frames / info["fps"] if info["fps"] else 0.0
+
+_progress_queue = None
+
+def use_fixed_model(model_path):
+    # Résultats hors ligne indépendants de la vitesse de la machine: pas de choix automatique
+    yolo_processor.MODEL_SELECTION = "fixed"
+    yolo_processor.MODEL_PATH = model_path
+
+def _init_worker(threads, progress_queue, conf, model_path):
+    global _progress_queue
+    # Part équitable des cœurs: pas de sur-souscription entre processus, quel que soit le moteur
+    import torch
+    torch.set_num_threads(threads)
+    yolo_processor.INFERENCE_THREADS = threads
+    cv2.setNumThreads(1)
+    setup_logging()
+    yolo_processor.CONFIDENCE_THRESHOLD_LIMIT = conf
+    use_fixed_model(model_path)
+    _progress_queue = progress_queue
+
+def _analyze_worker(task, part_path, object_ids, batch_size):
+    # Chaque processus écrit sa propre partie sur disque: rien de volumineux ne transite
+    video_path, start_frame, end_frame = task
+    writer = JsonlWriter(part_path)
+    start = time.perf_counter()
+    try:
+        get_predictor()
+    except Exception as e:
+        return task, None, 0, 0.0, f"Modèle indisponible ({yolo_processor.MODEL_PATH}): {e}", True
+    try:
+        # put bloquant sur une file bornée: un parent en retard ralentit les workers
+        frames, seconds = analyze_file(
+            video_path, writer, object_ids, batch_size,
+            progress=lambda count: _progress_queue.put(count),
+            start_frame=start_frame,
+            end_frame=end_frame
+        )
+    except (UnreadableVideoError, AnalysisError) as e:
+        return task, None, 0, 0.0, str(e), False
+    finally:
+        writer.close()
+    return task, frames, seconds, time.perf_counter() - start, None, False
+
+def plan_workers(requested, memory_budget_mb=None):
+    cpus = os.cpu_count() or 1
+    workers = max(1, min(requested, cpus))
+    if memory_budget_mb:
+        workers = max(1, min(workers, memory_budget_mb // WORKER_MEMORY_MB))
+    threads = max(1, cpus // workers)
+    return workers, threads
+
+def plan_tasks(video_paths, infos, shards):
+    # Une tâche par fichier, ou des plages de frames contiguës pour les fichiers découpés
+    tasks = []
+    for path in video_paths:
+        info = infos.get(path)
+        if shards <= 1 or not info or info["frames"] < shards * 2:
+            tasks.append((path, 0, None))
+            continue
+        bounds = [round(i * info["frames"] / shards) for i in range(shards + 1)]
+        for i in range(shards):
+            # La dernière tranche va jusqu'à la fin réelle (le nombre annoncé peut être faux)
+            tasks.append((path, bounds[i], bounds[i + 1] if i < shards - 1 else None))
+    return tasks
+
+def merge_parts(part_paths, writer):
+    # Fusion dans l'ordre des tâches: frames en double ignorées, trous signalés
+    last_frame = {}
+    for part_path in part_paths:
+        if not os.path.exists(part_path):
+            continue
+        with open(part_path, encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                video, frame = record["video"], record["frame"]
+                previous = last_frame.get(video, -1)
+                if frame <= previous:
+                    continue
+                if frame > previous + 1:
+                    print(f"Attention: frames {previous + 1}-{frame - 1} absentes pour {video}", file=sys.stderr)
+                last_frame[video] = frame
+                writer.write(record)
+
+def analyze_parallel(video_paths, output_path, object_ids, batch_size, conf, workers, memory_budget_mb=None, shards=1, model_path=None):
+    workers, threads = plan_workers(workers, memory_budget_mb)
+    infos = {path: video_info(path) for path in video_paths}
+    expected = sum(info["frames"] for info in infos.values() if info)
+    tasks = plan_tasks(video_paths, infos, shards)
+    print(f"{workers} processus, {threads} thread(s) de calcul chacun, {len(tasks)} tâche(s), {expected} frames attendues")
+
+    ctx = multiprocessing.get_context("spawn")
+    progress_queue = ctx.Queue(maxsize=workers * 4)
+    part_dir = tempfile.mkdtemp(prefix="vf_analyze_")
+    part_paths = [os.path.join(part_dir, f"{i:05d}.jsonl") for i in range(len(tasks))]
+
+    failed = []
+    total_frames, total_seconds, done_frames = 0, 0.0, 0
+    start = time.perf_counter()
+    last_report = start
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(threads, progress_queue, conf, model_path or yolo_processor.MODEL_PATH)
+        ) as executor:
+            futures = {
+                executor.submit(_analyze_worker, task, part, object_ids, batch_size): task
+                for task, part in zip(tasks, part_paths)
+            }
+            pending = set(futures)
+            while pending:
+                try:
+                    done_frames += progress_queue.get(timeout=0.2)
+                except queue.Empty:
+                    pass
+
+                now = time.perf_counter()
+                if now - last_report >= PROGRESS_INTERVAL:
+                    last_report = now
+                    percent = f" ({done_frames / expected * 100:.0f}%)" if expected else ""
+                    print(f"Progression: {done_frames}/{expected} frames{percent}, {done_frames / (now - start):.1f} frames/s")
+
+                for future in [f for f in pending if f.done()]:
+                    pending.discard(future)
+                    if future.cancelled():
+                        # Tâche annulée avant son démarrage: son fichier reste incomplet
+                        video_path = futures[future][0]
+                        if video_path not in failed:
+                            failed.append(video_path)
+                        continue
+                    (video_path, start_frame, end_frame), frames, seconds, elapsed, error, fatal = future.result()
+                    if error:
+                        print(f"Erreur: {error}", file=sys.stderr)
+                        if video_path not in failed:
+                            failed.append(video_path)
+                        if fatal:
+                            # Modèle inutilisable: les tâches en attente échoueraient de même. Celles
+                            # déjà en cours ne s'annulent pas et rendent leur propre résultat
+                            for other in pending:
+                                other.cancel()
+                        continue
+                    label = os.path.basename(video_path)
+                    if start_frame or end_frame is not None:
+                        label += f" [{start_frame}-{end_frame if end_frame is not None else 'fin'}]"
+                    print(f"{label}: ", end="")
+                    print_throughput(frames, seconds, elapsed)
+                    total_frames += frames
+                    total_seconds += seconds
+
+        writer = open_writer(output_path)
+        try:
+            merge_parts(part_paths, writer)
+        finally:
+            writer.close()
+    finally:
+        shutil.rmtree(part_dir, ignore_errors=True)
+
+    return failed, total_frames, total_seconds, time.perf_counter() - start
+
+def print_throughput(frames, video_seconds, elapsed):
+    fps = frames / elapsed if elapsed > 0 else 0.0
+    realtime = video_seconds / elapsed if elapsed > 0 else 0.0
+    print(f"{frames} frames en {elapsed:.1f}s: {fps:.2f} frames/s, facteur temps réel x{realtime:.2f}")
+
+def parse_object_ids(names):
+    if not names:
+        return None
+    unknown = [name for name in names if name not in COCO_NAME_TO_ID]
+    if unknown:
+        raise SystemExit(f"Objets inconnus: {', '.join(unknown)}")
+    return [COCO_NAME_TO_ID[name] for name in names]
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Détection YOLO sans interface sur des fichiers vidéo")
+    parser.add_argument("videos", nargs="+", help="Fichiers vidéo à analyser")
+    parser.add_argument("-o", "--output", default="detections.jsonl", help="Fichier de sortie .jsonl ou .parquet")
+    parser.add_argument("--objects", nargs="+", help="Classes COCO à conserver (toutes par défaut)")
+    parser.add_argument("--model", default=yolo_processor.MODEL_PATH, help="Poids YOLO (taille fixe, pas de choix automatique)")
+    parser.add_argument("--conf", type=float, default=yolo_processor.CONFIDENCE_THRESHOLD_LIMIT, help="Seuil de confiance")
+    parser.add_argument("--batch", default=yolo_processor.FILE_BATCH_SIZE, help="Taille de lot, ou auto")
+    parser.add_argument("--workers", type=int, default=1, help="Nombre de processus d'analyse en parallèle")
+    parser.add_argument("--memory-budget", type=int, help="Mémoire totale allouée aux processus (Mo)")
+    parser.add_argument("--shards", type=int, default=0, help="Tranches par fichier (par défaut: une par processus si un seul fichier)")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    setup_logging()
+    object_ids = parse_object_ids(args.objects)
+    yolo_processor.CONFIDENCE_THRESHOLD_LIMIT = args.conf
+    use_fixed_model(args.model)
+
+    shards = args.shards or (args.workers if len(args.videos) == 1 else 1)
+    if args.workers > 1 and (len(args.videos) > 1 or shards > 1):
+        failed, total_frames, total_seconds, elapsed = analyze_parallel(
+            args.videos, args.output, object_ids, args.batch, args.conf, args.workers, args.memory_budget, shards, args.model
+        )
+        return report_results(failed, total_frames, total_seconds, elapsed, args.output)
+
+    start = time.perf_counter()
+    try:
+        get_predictor()
+    except Exception as e:
+        print(f"Erreur: modèle indisponible ({args.model}): {e}", file=sys.stderr)
+        return 1
+    print(f"Modèle prêt en {time.perf_counter() - start:.1f}s")
+
+    failed = []
+    total_frames, total_seconds = 0, 0.0
+    writer = open_writer(args.output)
+    start = time.perf_counter()
+    try:
+        for video_path in args.videos:
+            try:
+                file_start = time.perf_counter()
+                frames, seconds = analyze_file(video_path, writer, object_ids, args.batch)
+            except (UnreadableVideoError, AnalysisError) as e:
+                print(f"Erreur: {e}", file=sys.stderr)
+                failed.append(video_path)
+                continue
+            print(f"{os.path.basename(video_path)}: ", end="")
+            print_throughput(frames, seconds, time.perf_counter() - file_start)
+            total_frames += frames
+            total_seconds += seconds
+    finally:
+        writer.close()
+
+    return report_results(failed, total_frames, total_seconds, time.perf_counter() - start, args.output)
+
+def report_results(failed, total_frames, total_seconds, elapsed, output_path):
+    print("Total: ", end="")
+    print_throughput(total_frames, total_seconds, elapsed)
+    print(f"Détections écrites dans {output_path}")
+
+    if failed:
+        print(f"{len(failed)} source(s) en échec: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,323 @@
+import importlib
+import os
+import re
+import shutil
+
+import cv2
+import numpy as np
+import torch
+
+# Moteurs d'inférence disponibles; chacun reçoit le lot letterboxé (uint8, NHWC, RGB)
+# et rend la sortie brute du réseau (B, 4 + classes, ancres) pour la NMS commune
+BACKENDS = ("pytorch", "onnxruntime", "openvino")
+
+# Précisions de calcul: bf16 (pytorch cpu, openvino) et INT8 (onnxruntime, openvino)
+PRECISIONS = ("fp32", "bf16", "int8-dynamic", "int8-static")
+INT8_PRECISIONS = ("int8-dynamic", "int8-static")
+
+def resolve_device(device):
+    # "auto": cuda, puis mps, puis cpu; un périphérique absent retombe sur le cpu
+    if device == "auto":
+        if torch.cuda.is_available():
+            return "cuda"
+        if torch.backends.mps.is_available():
+            return "mps"
+        return "cpu"
+    if device.startswith("cuda") and not torch.cuda.is_available():
+        print(f"Périphérique {device} indisponible, utilisation du cpu")
+        return "cpu"
+    if device == "mps" and not torch.backends.mps.is_available():
+        print("Périphérique mps indisponible, utilisation du cpu")
+        return "cpu"
+    return device
+
+def bf16_supported():
+    # Instructions bf16 natives (AVX512-BF16 / AMX); sans elles l'autocast est plus lent que le fp32
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+def resolve_precision(name, precision, device="cpu"):
+    # Précision réellement applicable au moteur; sinon retour au fp32 avec un message
+    if precision not in PRECISIONS:
+        raise ValueError(f"Précision inconnue: {precision} (choix: {', '.join(PRECISIONS)})")
+    reason = None
+    if precision == "bf16":
+        if name == "onnxruntime":
+            reason = "bf16 non pris en charge par onnxruntime sur cpu"
+        elif name == "pytorch" and (device != "cpu" or not bf16_supported()):
+            reason = "bf16 demande un processeur avec AVX512-BF16 ou AMX"
+    elif precision in INT8_PRECISIONS:
+        if name == "pytorch":
+            reason = "INT8 disponible avec les moteurs onnxruntime et openvino"
+        elif name == "openvino" and precision == "int8-dynamic":
+            reason = "openvino ne quantifie dynamiquement que les couches linéaires, utiliser int8-static"
+    if reason:
+        print(f"Précision {precision} ignorée ({reason}), calcul en fp32")
+        return "fp32"
+    return precision
+
+def to_network_input(batch):
+    # Lot uint8 NHWC -> float32 NCHW normalisé (données de calibration)
+    return np.ascontiguousarray(batch.transpose(0, 3, 1, 2), dtype=np.float32) / 255.0
+
+class TorchBackend:
+    name = "pytorch"
+
+    def __init__(self, net, device="cpu", precision="fp32"):
+        # net: réseau YOLO déjà fusionné (conv + batchnorm)
+        self.net = net.to(device).eval()
+        self.device = torch.device(device)
+        self.stride = int(max(self.net.stride))
+        self.precision = precision
+        self._tensors = {}
+
+    def __call__(self, batch):
+        # Conversion uint8 HWC -> float CHW normalisé, dans un tenseur réutilisé par forme
+        if batch.shape not in self._tensors:
+            b, h, w, _ = batch.shape
+            self._tensors[batch.shape] = torch.empty((b, 3, h, w), dtype=torch.float32, device=self.device)
+        tensor = self._tensors[batch.shape]
+        tensor.copy_(torch.from_numpy(batch).permute(0, 3, 1, 2))
+        tensor.div_(255.0)
+        if self.precision != "bf16":
+            return self.net(tensor)
+
+        # Poids et activations en bf16, sortie remise en fp32 pour la NMS
+        with torch.autocast("cpu", dtype=torch.bfloat16):
+            preds = self.net(tensor)
+        if isinstance(preds, (list, tuple)):
+            preds = preds[0]
+        return preds.float()
+
+class _NumpyInputBackend:
+    # Entrée float32 NCHW en mémoire hôte, commune à ONNX Runtime et OpenVINO
+    def __init__(self, stride):
+        self.stride = stride
+        self._inputs = {}
+
+    def _prepare(self, batch):
+        if batch.shape not in self._inputs:
+            b, h, w, _ = batch.shape
+            self._inputs[batch.shape] = np.empty((b, 3, h, w), dtype=np.float32)
+        array = self._inputs[batch.shape]
+        np.multiply(batch.transpose(0, 3, 1, 2), 1 / 255.0, out=array, casting="unsafe")
+        return array
+
+class OnnxRuntimeBackend(_NumpyInputBackend):
+    name = "onnxruntime"
+
+    def __init__(self, onnx_path, stride, threads=0, precision="fp32"):
+        import onnxruntime as ort
+
+        super().__init__(stride)
+        self.precision = precision
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, batch):
+        output = self.session.run(None, {self.input_name: self._prepare(batch)})[0]
+        return torch.from_numpy(output)
+
+class OpenVinoBackend(_NumpyInputBackend):
+    name = "openvino"
+
+    def __init__(self, model_path, stride, cache_dir=None, precision="fp32", threads=0):
+        import openvino as ov
+
+        super().__init__(stride)
+        self.precision = precision
+        core = ov.Core()
+        if cache_dir:
+            # Le réseau compilé pour ce processeur est gardé sur disque et relu aux lancements suivants
+            core.set_property({"CACHE_DIR": cache_dir})
+        # Lecture directe du fichier ONNX (ou IR quantifié); le mode latence convient au flux
+        # frame par frame. La précision est fixée: le cpu passerait sinon seul en bf16 sur AMX
+        config = {
+            "PERFORMANCE_HINT": "LATENCY",
+            "INFERENCE_PRECISION_HINT": "bf16" if precision == "bf16" else "f32"
+        }
+        if threads > 0:
+            config["INFERENCE_NUM_THREADS"] = threads
+        self.compiled = core.compile_model(core.read_model(model_path), "CPU", config)
+        self.request = self.compiled.create_infer_request()
+
+    def __call__(self, batch):
+        self.request.infer({0: self._prepare(batch)})
+        return torch.from_numpy(self.request.get_output_tensor(0).data.copy())
+
+def export_onnx(yolo_model, target_path, imgsz):
+    # Entrée dynamique: lot et taille variables (letterbox rectangulaire)
+    print(f"Export ONNX du modèle vers {target_path}...")
+    exported = yolo_model.export(format="onnx", imgsz=imgsz, dynamic=True, verbose=False)
+    if os.path.abspath(exported) != os.path.abspath(target_path):
+        shutil.move(exported, target_path)
+    return target_path
+
+def _torch_backend(weights_path, imgsz, device, load_model, cache, precision="fp32"):
+    path = None
+    if cache is not None:
+        path = cache.artifact_path(weights_path, imgsz, "pytorch")
+        if cache.read_meta(path) is not None:
+            try:
+                return TorchBackend(cache.load_module(path), device, precision)
+            except Exception as e:
+                print(f"Artefact {path} illisible ({e}), reconstruction")
+
+    yolo_model = load_model()
+    yolo_model.fuse()
+    net = yolo_model.model
+    if path is not None:
+        # Sauvegarde avant le transfert vers le périphérique: l'artefact reste chargeable partout
+        cache.save_module(path, net)
+        cache.write_meta(path, int(max(net.stride)), yolo_model.names)
+    return TorchBackend(net, device, precision)
+
+def _onnx_artifact(name, weights_path, imgsz, load_model, cache):
+    if cache is None:
+        # Sans cache d'artefacts: export à côté des poids, refait s'ils ont changé
+        path = os.path.splitext(weights_path)[0] + ".onnx"
+        yolo_model = load_model()
+        if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(weights_path):
+            export_onnx(yolo_model, path, imgsz)
+        return path, int(max(yolo_model.model.stride))
+
+    path = cache.artifact_path(weights_path, imgsz, name)
+    meta = cache.read_meta(path)
+    if meta is None:
+        yolo_model = load_model()
+        export_onnx(yolo_model, path, imgsz)
+        cache.write_meta(path, int(max(yolo_model.model.stride)), yolo_model.names)
+        meta = cache.read_meta(path)
+    return path, meta["stride"]
+
+def read_calibration_frames(video_path, count=32):
+    # Frames réparties sur toute la vidéo, pour que la calibration voie des scènes variées
+    cap = cv2.VideoCapture(video_path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    frames = []
+    for index in np.linspace(0, max(total - 1, 0), count).astype(int):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, int(index))
+        ret, frame = cap.read()
+        if ret:
+            frames.append(frame)
+    cap.release()
+    if not frames:
+        raise ValueError(f"Aucune frame de calibration lue dans {video_path}")
+    return frames
+
+def _calibration_batches(frames, imgsz, stride):
+    from fast_predictor import Letterbox
+
+    letterbox = Letterbox(imgsz, stride)
+    return [to_network_input(letterbox([frame])) for frame in frames]
+
+def _head_nodes(onnx_path):
+    # Nœuds de la tête de détection (dernier module /model.N/), laissés en fp32:
+    # le décodage des boîtes et la DFL supportent mal la quantification
+    import onnx
+
+    graph = onnx.load(onnx_path).graph
+    indices = [int(match.group(1)) for match in (re.match(r"/model\.(\d+)/", node.name) for node in graph.node) if match]
+    if not indices:
+        return None, [], graph.input[0].name
+    prefix = f"/model.{max(indices)}/"
+    return prefix, [node.name for node in graph.node if node.name.startswith(prefix)], graph.input[0].name
+
+def quantize_onnx(onnx_path, target_path, precision, calibration=None):
+    from onnxruntime.quantization import (
+        CalibrationDataReader, QuantFormat, QuantType, quantize_dynamic, quantize_static
+    )
+
+    _, excluded, input_name = _head_nodes(onnx_path)
+    if precision == "int8-dynamic":
+        # Poids en INT8, échelles des activations calculées à chaque inférence
+        quantize_dynamic(onnx_path, target_path, weight_type=QuantType.QUInt8, nodes_to_exclude=excluded)
+        return target_path
+
+    class FrameReader(CalibrationDataReader):
+        def __init__(self):
+            self._batches = iter(calibration)
+
+        def get_next(self):
+            batch = next(self._batches, None)
+            return None if batch is None else {input_name: batch}
+
+    # Échelles des activations fixées une fois pour toutes sur les frames de calibration
+    quantize_static(
+        onnx_path, target_path, FrameReader(),
+        quant_format=QuantFormat.QDQ, per_channel=True,
+        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+        nodes_to_exclude=excluded
+    )
+    return target_path
+
+def quantize_openvino(onnx_path, target_path, calibration):
+    import nncf
+    import openvino as ov
+
+    prefix, _, _ = _head_nodes(onnx_path)
+    ignored = nncf.IgnoredScope(patterns=[re.escape(prefix) + ".*"], validate=False) if prefix else None
+    quantized = nncf.quantize(
+        ov.Core().read_model(onnx_path), nncf.Dataset(calibration),
+        preset=nncf.QuantizationPreset.MIXED, ignored_scope=ignored
+    )
+    ov.save_model(quantized, target_path)
+    return target_path
+
+def _int8_artifact(name, onnx_path, stride, weights_path, imgsz, precision, calibration, cache):
+    extension = ".xml" if name == "openvino" else ".onnx"
+    if cache is not None:
+        path = cache.artifact_path(weights_path, imgsz, name, precision, extension)
+        ready = cache.read_meta(path) is not None
+    else:
+        path = f"{os.path.splitext(onnx_path)[0]}-{name}-{precision}{extension}"
+        ready = os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(onnx_path)
+    if ready:
+        return path
+
+    print(f"Quantification {precision} du modèle pour {name}...")
+    batches = _calibration_batches(calibration(), imgsz, stride) if precision == "int8-static" else None
+    if name == "onnxruntime":
+        quantize_onnx(onnx_path, path, precision, batches)
+    else:
+        quantize_openvino(onnx_path, path, batches)
+    if cache is not None:
+        cache.write_meta(path, stride)
+    return path
+
+def create_backend(name, weights_path, imgsz=640, device="cpu", load_model=None, cache=None, precision="fp32", calibration=None, threads=0):
+    # load_model: charge le modèle YOLO, appelé seulement si aucun artefact n'est en cache
+    # calibration: fonction rendant les frames de calibration (INT8 statique)
+    # threads: cœurs de calcul du moteur ONNX Runtime / OpenVINO (0: choix du moteur);
+    # PyTorch se règle pour tout le processus par torch.set_num_threads
+    if name not in BACKENDS:
+        raise ValueError(f"Moteur d'inférence inconnu: {name} (choix: {', '.join(BACKENDS)})")
+    device = resolve_device(device) if name == "pytorch" else "cpu"
+
+    if precision == "int8-static" and calibration is None:
+        print("Aucune vidéo de calibration pour int8-static, quantification dynamique")
+        precision = "int8-dynamic"
+    precision = resolve_precision(name, precision, device)
+
+    if name != "pytorch":
+        try:
+            # Moteur vérifié avant l'export, qui prend plusieurs secondes
+            importlib.import_module(name)
+            model_path, stride = _onnx_artifact(name, weights_path, imgsz, load_model, cache)
+            if precision in INT8_PRECISIONS:
+                model_path = _int8_artifact(name, model_path, stride, weights_path, imgsz, precision, calibration, cache)
+            if name == "onnxruntime":
+                return OnnxRuntimeBackend(model_path, stride, threads=threads, precision=precision)
+            return OpenVinoBackend(model_path, stride, cache.openvino_dir() if cache else None, precision=precision, threads=threads)
+        except Exception as e:
+            # Dépendance absente ou export impossible: PyTorch reste toujours disponible
+            print(f"Moteur {name} indisponible ({e}), utilisation de PyTorch")
+            device = resolve_device("auto")
+            precision = resolve_precision("pytorch", precision, device)
+
+    return _torch_backend(weights_path, imgsz, device, load_model, cache, precision)
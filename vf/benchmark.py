@@ -0,0 +1,366 @@
+"""
+Mesures de performance de l'application (à lancer depuis le dossier vf/)
+
+    python benchmark.py startup
+    python benchmark.py batch video.mp4 --sizes 1 2 4 8
+    python benchmark.py tracker --boxes 1 10 50 100 200
+    python benchmark.py filters video.mp4 --objects cup chair tv laptop book
+    python benchmark.py predictor video.mp4
+    python benchmark.py backends video.mp4 --backends pytorch onnxruntime openvino
+    python benchmark.py model --backend pytorch
+    python benchmark.py precision video.mp4 --backend onnxruntime --modes fp32 int8-dynamic int8-static
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+
+# Script exécuté dans un interpréteur neuf pour mesurer un vrai démarrage à froid
+STARTUP_SCRIPT = """
+import sys, time
+t0 = time.perf_counter()
+import video_app
+t_import = time.perf_counter() - t0
+t_menu = None
+try:
+    app = video_app.VideoApp()
+    # Premier dessin du menu: tâches d'affichage en attente exécutées (pas de mainloop)
+    app.root.update_idletasks()
+    t_menu = time.perf_counter() - t0
+    app.root.destroy()
+except Exception as e:
+    print(f"(pas d'affichage disponible: {e})", file=sys.stderr)
+heavy = [m for m in ("torch", "ultralytics") if m in sys.modules]
+print(t_import, t_menu, ",".join(heavy))
+"""
+
+def bench_startup(runs=5):
+    imports, menus = [], []
+    heavy = ""
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT],
+            capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1].split(" ")
+        imports.append(float(out[0]))
+        if out[1] != "None":
+            menus.append(float(out[1]))
+        heavy = out[2] if len(out) > 2 else ""
+
+    print(f"Import de video_app : min {min(imports)*1000:.0f} ms, médiane {sorted(imports)[len(imports)//2]*1000:.0f} ms")
+    if menus:
+        print(f"Menu affiché       : min {min(menus)*1000:.0f} ms, médiane {sorted(menus)[len(menus)//2]*1000:.0f} ms")
+    else:
+        print("Menu affiché       : non mesuré (pas d'affichage disponible)")
+    print(f"Modules lourds importés au démarrage: {heavy or 'aucun'}")
+
+# Chargement du prédicteur et première inférence, dans un interpréteur neuf
+MODEL_STARTUP_SCRIPT = """
+import sys, time
+t0 = time.perf_counter()
+import numpy as np
+import yolo_processor
+yolo_processor.BACKEND = sys.argv[1]
+yolo_processor.MODEL_SELECTION = "fixed"
+yolo_processor.MODEL_PATH = sys.argv[2]
+yolo_processor.MODEL_CACHE = sys.argv[3] != "-"
+yolo_processor.MODEL_CACHE_DIR = sys.argv[3]
+predictor = yolo_processor.get_predictor()
+t_load = time.perf_counter() - t0
+predictor([np.zeros((480, 640, 3), dtype=np.uint8)])
+print(t_load, time.perf_counter() - t0, yolo_processor.model is not None)
+"""
+
+def _model_startup(backend, weights, cache_dir):
+    out = subprocess.run(
+        [sys.executable, "-c", MODEL_STARTUP_SCRIPT, backend, weights, cache_dir],
+        capture_output=True, text=True, check=True
+    ).stdout.strip().splitlines()[-1].split(" ")
+    return float(out[0]), float(out[1]), out[2] == "True"
+
+def bench_model_startup(backend, weights, runs=3):
+    import tempfile
+
+    def report(label, samples):
+        loads = sorted(sample[0] for sample in samples)
+        firsts = sorted(sample[1] for sample in samples)
+        reloaded = "oui" if any(sample[2] for sample in samples) else "non"
+        print(f"{label:<22} {loads[len(loads)//2]*1000:>10.0f} {firsts[len(firsts)//2]*1000:>14.0f} {reloaded:>10}")
+
+    print(f"Moteur {backend}, poids {weights}, médiane sur {runs} lancements")
+    print(f"{'démarrage':<22} {'chargé ms':>10} {'1re frame ms':>14} {'.pt relu':>10}")
+    report("sans cache", [_model_startup(backend, weights, "-") for _ in range(runs)])
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # À froid: cache vide, l'artefact est créé pendant le lancement
+        cold = []
+        for _ in range(runs):
+            with tempfile.TemporaryDirectory() as empty_dir:
+                cold.append(_model_startup(backend, weights, empty_dir))
+        report("cache à froid", cold)
+
+        _model_startup(backend, weights, cache_dir)
+        report("cache à chaud", [_model_startup(backend, weights, cache_dir) for _ in range(runs)])
+
+def load_frames(video_path, count):
+    import cv2
+
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        raise SystemExit(f"Impossible de lire des frames depuis {video_path}")
+    return frames
+
+def bench_batch(video_path, sizes, count):
+    from yolo_processor import get_predictor
+
+    predictor = get_predictor()
+    frames = load_frames(video_path, count)
+
+    # Préchauffage hors mesure
+    predictor(frames[:max(sizes)])
+
+    print(f"{len(frames)} frames de {video_path}")
+    print(f"{'lot':>5} {'frames/s':>10} {'ms/frame':>10}")
+    for size in sizes:
+        start = time.perf_counter()
+        for i in range(0, len(frames), size):
+            predictor(frames[i:i + size])
+        elapsed = time.perf_counter() - start
+        print(f"{size:>5} {len(frames) / elapsed:>10.2f} {elapsed / len(frames) * 1000:>10.1f}")
+
+def bench_tracker(box_counts, frames):
+    import numpy as np
+    from tracker import ByteTracker
+
+    rng = np.random.default_rng(0)
+    print(f"{'boîtes':>7} {'µs/update':>10}")
+    for count in box_counts:
+        tracker = ByteTracker()
+        # Objets en mouvement rectiligne avec bruit de détection
+        origins = rng.uniform(0, 1200, (count, 2))
+        sizes = rng.uniform(20, 120, (count, 2))
+        velocities = rng.uniform(-4, 4, (count, 2))
+        classes = rng.integers(0, 80, count)
+
+        elapsed = 0.0
+        for f in range(frames):
+            centers = origins + velocities * f + rng.normal(0, 1, (count, 2))
+            boxes = np.concatenate([centers - sizes / 2, centers + sizes / 2], axis=1)
+            confidences = rng.uniform(0.2, 0.95, count)
+            start = time.perf_counter()
+            tracker.update(boxes, classes, confidences)
+            elapsed += time.perf_counter() - start
+
+        print(f"{count:>7} {elapsed / frames * 1e6:>10.0f}")
+
+def bench_filters(video_path, objects, count):
+    from coco_classes import COCO_NAME_TO_ID
+    from metrics import metrics
+    from yolo_processor import get_predictor, CONFIDENCE_THRESHOLD_LIMIT, MAX_DETECTIONS
+
+    predictor = get_predictor()
+    frames = load_frames(video_path, count)
+    class_ids = [COCO_NAME_TO_ID[name] for name in objects if name in COCO_NAME_TO_ID]
+    predictor([frames[0]])
+
+    # Post-traitement (NMS, remise à l'échelle) mesuré par le prédicteur lui-même
+    configs = [
+        ("sans filtre", {}),
+        ("filtre dans l'appel", {"classes": class_ids, "conf": CONFIDENCE_THRESHOLD_LIMIT, "max_det": MAX_DETECTIONS}),
+    ]
+    print(f"{len(frames)} frames, classes cibles: {', '.join(objects)}")
+    print(f"{'mode':<22} {'postprocess ms':>15} {'boîtes/frame':>13}")
+    for label, kwargs in configs:
+        metrics.reset()
+        boxes = 0
+        for frame in frames:
+            boxes += len(predictor([frame], **kwargs)[0])
+        post = metrics.snapshot()["latency"]["postprocess"]["p50_ms"]
+        print(f"{label:<22} {post:>15.2f} {boxes / len(frames):>13.1f}")
+
+def bench_predictor(video_path, count):
+    from yolo_processor import get_model, get_predictor, CONFIDENCE_THRESHOLD_LIMIT
+
+    model = get_model()
+    fast = get_predictor()
+    frames = load_frames(video_path, count)
+
+    model(frames[0], verbose=False)
+    fast([frames[0]])
+
+    # Même réseau des deux côtés: l'écart mesure le surcoût par appel
+    start = time.perf_counter()
+    for frame in frames:
+        model(frame, conf=CONFIDENCE_THRESHOLD_LIMIT, verbose=False)
+    standard = (time.perf_counter() - start) / len(frames)
+
+    start = time.perf_counter()
+    for frame in frames:
+        fast([frame], conf=CONFIDENCE_THRESHOLD_LIMIT)
+    direct = (time.perf_counter() - start) / len(frames)
+
+    print(f"model(frame)      : {standard * 1000:.2f} ms/frame")
+    print(f"prédicteur direct : {direct * 1000:.2f} ms/frame")
+    print(f"surcoût économisé : {(standard - direct) * 1000:.2f} ms/frame")
+
+def compare_detections(reference, candidate, iou=0.9):
+    # Écarts d'une sortie face à la référence: boîtes appariées par IoU et même classe
+    from tracker import iou_matrix, greedy_match
+
+    matched = total = 0
+    box_error = conf_error = 0.0
+    for ref, cand in zip(reference, candidate):
+        total += max(len(ref), len(cand))
+        overlaps = iou_matrix(ref[:, :4], cand[:, :4])
+        if overlaps.size:
+            overlaps[ref[:, 5][:, None] != cand[:, 5][None, :]] = 0
+        matches, _, _ = greedy_match(overlaps, iou)
+        for i, j in matches:
+            matched += 1
+            box_error = max(box_error, float(abs(ref[i, :4] - cand[j, :4]).max()))
+            conf_error = max(conf_error, float(abs(ref[i, 4] - cand[j, 4])))
+    return matched / total if total else 1.0, box_error, conf_error
+
+def bench_backends(video_path, names, count):
+    import yolo_processor
+    from backends import create_backend
+    from fast_predictor import FastPredictor
+
+    frames = load_frames(video_path, count)
+    conf = yolo_processor.CONFIDENCE_THRESHOLD_LIMIT
+
+    print(f"{len(frames)} frames de {video_path}, imgsz {yolo_processor.IMAGE_SIZE}")
+    print(f"{'moteur':<12} {'ms/frame':>9} {'frames/s':>9} {'appariées':>10} {'écart px':>9} {'écart conf':>11}")
+    reference = None
+    for name in names:
+        backend = create_backend(
+            name, yolo_processor.resolve_weights(yolo_processor.MODEL_PATH), yolo_processor.IMAGE_SIZE, yolo_processor.DEVICE,
+            load_model=yolo_processor.get_model, cache=yolo_processor.get_model_cache(),
+            threads=yolo_processor.INFERENCE_THREADS
+        )
+        if backend.name != name:
+            print(f"{name:<12} indisponible")
+            continue
+        fast = FastPredictor(backend, imgsz=yolo_processor.IMAGE_SIZE, iou=yolo_processor.NMS_IOU_THRESHOLD)
+        fast([frames[0]], conf=conf)
+
+        outputs = []
+        start = time.perf_counter()
+        for frame in frames:
+            outputs.extend(fast([frame], conf=conf))
+        elapsed = (time.perf_counter() - start) / len(frames)
+
+        # Le premier moteur mesuré sert de référence pour la comparaison des sorties
+        if reference is None:
+            reference = outputs
+        ratio, box_error, conf_error = compare_detections(reference, outputs)
+        print(f"{name:<12} {elapsed * 1000:>9.2f} {1 / elapsed:>9.2f} {ratio:>9.1%} {box_error:>9.2f} {conf_error:>11.4f}")
+
+def bench_precision(video_path, backend_name, modes, count, calibration_video=None):
+    import yolo_processor
+    from backends import create_backend, read_calibration_frames
+    from fast_predictor import FastPredictor
+
+    frames = load_frames(video_path, count)
+    conf = yolo_processor.CONFIDENCE_THRESHOLD_LIMIT
+    # Calibration sur une autre vidéo si possible: calibrer sur le clip mesuré flatte l'INT8
+    calibration_source = calibration_video or video_path
+    calibration = lambda: read_calibration_frames(calibration_source, yolo_processor.CALIBRATION_FRAMES)
+
+    print(f"{len(frames)} frames de {video_path}, moteur {backend_name}, référence fp32")
+    print(f"{'précision':<14} {'ms/frame':>9} {'accélération':>13} {'appariées':>10} {'écart px':>9} {'écart conf':>11}")
+    reference = reference_time = None
+    for mode in ["fp32"] + [m for m in modes if m != "fp32"]:
+        backend = create_backend(
+            backend_name, yolo_processor.resolve_weights(yolo_processor.MODEL_PATH), yolo_processor.IMAGE_SIZE, yolo_processor.DEVICE,
+            load_model=yolo_processor.get_model, cache=yolo_processor.get_model_cache(),
+            precision=mode, calibration=calibration, threads=yolo_processor.INFERENCE_THREADS
+        )
+        if (backend.name, backend.precision) != (backend_name, mode):
+            print(f"{mode:<14} indisponible")
+            continue
+        fast = FastPredictor(backend, imgsz=yolo_processor.IMAGE_SIZE, iou=yolo_processor.NMS_IOU_THRESHOLD)
+        fast([frames[0]], conf=conf)
+
+        outputs = []
+        start = time.perf_counter()
+        for frame in frames:
+            outputs.extend(fast([frame], conf=conf))
+        elapsed = (time.perf_counter() - start) / len(frames)
+
+        if reference is None:
+            reference, reference_time = outputs, elapsed
+        # IoU 0.5: une boîte décalée de quelques pixels par la quantification reste appariée
+        ratio, box_error, conf_error = compare_detections(reference, outputs, iou=0.5)
+        print(f"{mode:<14} {elapsed * 1000:>9.2f} {reference_time / elapsed:>12.2f}x {ratio:>9.1%} {box_error:>9.2f} {conf_error:>11.4f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de l'analyseur vidéo YOLO")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_startup = sub.add_parser("startup", help="Temps de démarrage à froid jusqu'au menu")
+    p_startup.add_argument("--runs", type=int, default=5)
+
+    p_batch = sub.add_parser("batch", help="Débit d'inférence hors ligne selon la taille de lot")
+    p_batch.add_argument("video")
+    p_batch.add_argument("--sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    p_batch.add_argument("--frames", type=int, default=64)
+
+    p_tracker = sub.add_parser("tracker", help="Coût de mise à jour du tracker selon le nombre de boîtes")
+    p_tracker.add_argument("--boxes", type=int, nargs="+", default=[1, 10, 50, 100, 200])
+    p_tracker.add_argument("--frames", type=int, default=300)
+
+    p_filters = sub.add_parser("filters", help="Coût NMS/postprocess avec et sans filtrage dans l'appel")
+    p_filters.add_argument("video")
+    p_filters.add_argument("--objects", nargs="+", default=["cup", "chair", "tv", "laptop", "book"])
+    p_filters.add_argument("--frames", type=int, default=50)
+
+    p_predictor = sub.add_parser("predictor", help="Surcoût par frame de model() face au prédicteur direct")
+    p_predictor.add_argument("video")
+    p_predictor.add_argument("--frames", type=int, default=100)
+
+    p_backends = sub.add_parser("backends", help="Vitesse et écarts de sortie entre moteurs d'inférence")
+    p_backends.add_argument("video")
+    p_backends.add_argument("--backends", nargs="+", default=["pytorch", "onnxruntime", "openvino"])
+    p_backends.add_argument("--frames", type=int, default=100)
+
+    p_model = sub.add_parser("model", help="Démarrage du modèle sans cache, cache à froid et cache à chaud")
+    p_model.add_argument("--backend", default="pytorch")
+    p_model.add_argument("--weights", default="yolov8m.pt")
+    p_model.add_argument("--runs", type=int, default=3)
+
+    p_precision = sub.add_parser("precision", help="Vitesse et écart au fp32 des précisions réduites")
+    p_precision.add_argument("video")
+    p_precision.add_argument("--backend", default="onnxruntime")
+    p_precision.add_argument("--modes", nargs="+", default=["bf16", "int8-dynamic", "int8-static"])
+    p_precision.add_argument("--frames", type=int, default=100)
+    p_precision.add_argument("--calibration", help="Vidéo de calibration INT8 (par défaut: la vidéo mesurée)")
+
+    args = parser.parse_args()
+    if args.command == "startup":
+        bench_startup(args.runs)
+    elif args.command == "batch":
+        bench_batch(args.video, args.sizes, args.frames)
+    elif args.command == "tracker":
+        bench_tracker(args.boxes, args.frames)
+    elif args.command == "filters":
+        bench_filters(args.video, args.objects, args.frames)
+    elif args.command == "predictor":
+        bench_predictor(args.video, args.frames)
+    elif args.command == "backends":
+        bench_backends(args.video, args.backends, args.frames)
+    elif args.command == "model":
+        bench_model_startup(args.backend, args.weights, args.runs)
+    elif args.command == "precision":
+        bench_precision(args.video, args.backend, args.modes, args.frames, args.calibration)
+
+if __name__ == "__main__":
+    main()
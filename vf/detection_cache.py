@@ -0,0 +1,215 @@
+import hashlib
+import os
+import threading
+from collections import deque
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "vf", "detections")
+CHUNK_FRAMES = 256
+SAMPLE_BYTES = 1 << 20  # Taille de chaque extrait lu pour l'empreinte d'une vidéo
+
+_weights_hashes = {}
+
+def video_fingerprint(path):
+    # Empreinte du contenu sans tout relire: taille + début, milieu et fin du fichier
+    size = os.path.getsize(path)
+    digest = hashlib.sha256(str(size).encode())
+    with open(path, "rb") as f:
+        for offset in (0, max(0, size // 2 - SAMPLE_BYTES // 2), max(0, size - SAMPLE_BYTES)):
+            f.seek(offset)
+            digest.update(f.read(SAMPLE_BYTES))
+    return digest.hexdigest()
+
+def weights_hash(path):
+    # Hash complet des poids, mémorisé tant que le fichier ne change pas
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime)
+    if key not in _weights_hashes:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        _weights_hashes[key] = digest.hexdigest()
+    return _weights_hashes[key]
+
+class DetectionCache:
+    # Cache disque des détections brutes par frame, regroupées en blocs de CHUNK_FRAMES frames.
+    # Éviction LRU par taille totale: la date d'accès d'un bloc est sa date de modification.
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def session(self, video_path, weights_path, imgsz, extra=""):
+        key = hashlib.sha256(
+            f"{video_fingerprint(video_path)}|{weights_hash(weights_path)}|{imgsz}|{extra}".encode()
+        ).hexdigest()[:32]
+        return CacheSession(self, os.path.join(self.directory, key))
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "bytes": self._usage()[0]
+        }
+
+    def _usage(self):
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        return sum(size for _, size, _ in files), files
+
+    def evict(self):
+        with self._lock:
+            total, files = self._usage()
+            if total <= self.max_bytes:
+                return
+            # Les blocs les moins récemment utilisés partent en premier
+            for _, size, path in sorted(files):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+class CacheSession:
+    def __init__(self, cache, directory):
+        self.cache = cache
+        self.directory = directory
+        self._chunks = {}
+        self._pending = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _chunk_path(self, chunk):
+        return os.path.join(self.directory, f"{chunk:06d}.npz")
+
+    def _read_chunk(self, chunk):
+        # (offsets, boxes, present): la frame i du bloc est boxes[offsets[i]:offsets[i + 1]]
+        # si present[i]; un bloc peut avoir des trous (tranche commencée en cours de bloc)
+        path = self._chunk_path(chunk)
+        try:
+            with np.load(path) as data:
+                offsets, boxes = data["offsets"], data["boxes"]
+                # Blocs écrits avant l'ajout du masque: préfixe contigu
+                present = data["present"] if "present" in data else np.ones(len(offsets) - 1, dtype=bool)
+            os.utime(path)
+            return offsets, boxes, present
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def _load_chunk(self, chunk):
+        if chunk not in self._chunks:
+            self._chunks[chunk] = self._read_chunk(chunk)
+        return self._chunks[chunk]
+
+    @staticmethod
+    def _has(loaded, position):
+        return loaded is not None and position < len(loaded[2]) and loaded[2][position]
+
+    def get(self, frame_index):
+        chunk, position = divmod(frame_index, CHUNK_FRAMES)
+        loaded = self._load_chunk(chunk)
+        if not self._has(loaded, position):
+            self.cache.record(False)
+            return None
+        offsets, boxes, _ = loaded
+        self.cache.record(True)
+        return boxes[offsets[position]:offsets[position + 1]]
+
+    def put(self, frame_index, detections):
+        chunk, position = divmod(frame_index, CHUNK_FRAMES)
+        loaded = self._load_chunk(chunk)
+        if self._has(loaded, position):
+            return
+
+        if chunk not in self._pending:
+            self._pending[chunk] = {}
+            if loaded is not None:
+                # Bloc partiel (session interrompue): on le complète au lieu de l'ignorer
+                self._merge(self._pending[chunk], loaded)
+        frames = self._pending[chunk]
+        frames[position] = np.asarray(detections, dtype=np.float32).reshape(-1, 6)
+        if len(frames) == CHUNK_FRAMES:
+            self._flush(chunk)
+
+    @staticmethod
+    def _merge(frames, loaded):
+        offsets, boxes, present = loaded
+        for i in np.flatnonzero(present):
+            frames.setdefault(int(i), boxes[offsets[i]:offsets[i + 1]])
+
+    def _flush(self, chunk):
+        frames = self._pending.pop(chunk, {})
+        if not frames:
+            return
+        # Un autre processus (tranche voisine du même fichier) a pu écrire une autre
+        # partie du bloc depuis sa lecture: on relit le fichier pour ne rien écraser
+        on_disk = self._read_chunk(chunk)
+        if on_disk is not None:
+            self._merge(frames, on_disk)
+
+        count = max(frames) + 1
+        empty = np.zeros((0, 6), dtype=np.float32)
+        parts = [frames.get(i, empty) for i in range(count)]
+        present = np.zeros(count, dtype=bool)
+        present[list(frames)] = True
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(p) for p in parts])
+        boxes = np.concatenate(parts) if offsets[-1] else empty
+
+        path = self._chunk_path(chunk)
+        temp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(temp_path, offsets=offsets, boxes=boxes, present=present)
+        os.replace(temp_path, path)
+        self._chunks[chunk] = (offsets, boxes, present)
+        self.cache.evict()
+
+    def close(self):
+        for chunk in list(self._pending):
+            self._flush(chunk)
+
+class RawDetectionBuffer:
+    # Détections brutes (toutes classes, toutes confiances) des dernières frames d'une
+    # session, en mémoire: effet d'un changement de filtre compté sans nouvelle inférence
+    def __init__(self, max_frames=150):
+        self.frames = deque(maxlen=max_frames)
+        self._lock = threading.Lock()
+
+    def add(self, frame_index, detections):
+        with self._lock:
+            self.frames.append((frame_index, detections))
+
+    def __len__(self):
+        return len(self.frames)
+
+    def count(self, class_mask, conf):
+        # Nombre de détections retenues par un filtre (class_mask: tableau booléen par classe)
+        with self._lock:
+            frames = list(self.frames)
+        total = 0
+        for _, detections in frames:
+            if len(detections):
+                keep = class_mask[detections[:, 5].astype(int)] & (detections[:, 4] >= conf)
+                total += int(np.count_nonzero(keep))
+        return total, len(frames)
@@ -4,8 +4,12 @@ from tkinter import Canvas
 from confetti_effect import create_confetti_effect
 
 from ui_components import GameButton, COLORS
+from yolo_processor import start_warmup
 
 def show_ready_dialog(app):
+    # Le préchauffage continue pendant que les joueurs lisent la fenêtre
+    start_warmup()
+
     ready_window = Toplevel(app.root)
     ready_window.title("Nouveau jeu")
     ready_window.geometry("400x300")
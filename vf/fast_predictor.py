@@ -0,0 +1,97 @@
+import time
+
+import cv2
+import numpy as np
+import torch
+from ultralytics.utils import ops
+
+from metrics import metrics
+from tracing import tracer
+
+try:
+    from ultralytics.utils.nms import non_max_suppression
+except ImportError:  # ultralytics < 8.3.150
+    non_max_suppression = ops.non_max_suppression
+
+PAD_VALUE = 114  # Gris utilisé par ultralytics pour le letterbox
+
+class Letterbox:
+    # Letterbox rectangulaire dans des tampons réutilisés, BGR -> RGB fusionné dans la copie
+    def __init__(self, imgsz=640, stride=32):
+        self.imgsz = imgsz
+        self.stride = stride
+        self._buffers = {}
+
+    def layout(self, height, width, imgsz=None):
+        # Marge minimale, arrondie au multiple du stride
+        imgsz = imgsz or self.imgsz
+        ratio = min(imgsz / height, imgsz / width)
+        new_w, new_h = int(round(width * ratio)), int(round(height * ratio))
+        pad_w = (imgsz - new_w) % self.stride
+        pad_h = (imgsz - new_h) % self.stride
+        left, top = int(round(pad_w / 2 - 0.1)), int(round(pad_h / 2 - 0.1))
+        return new_w, new_h, new_w + pad_w, new_h + pad_h, left, top
+
+    def _get_buffers(self, batch, height, width, imgsz):
+        key = (batch, height, width, imgsz)
+        if key not in self._buffers:
+            new_w, new_h, in_w, in_h, left, top = self.layout(height, width, imgsz)
+            padded = np.full((batch, in_h, in_w, 3), PAD_VALUE, dtype=np.uint8)
+            resized = np.empty((new_h, new_w, 3), dtype=np.uint8)
+            self._buffers[key] = (padded, resized, (new_w, new_h, left, top))
+        return self._buffers[key]
+
+    def __call__(self, frames, imgsz=None):
+        # Lot uint8 NHWC; toutes les frames d'un lot ont la même taille
+        height, width = frames[0].shape[:2]
+        padded, resized, (new_w, new_h, left, top) = self._get_buffers(len(frames), height, width, imgsz or self.imgsz)
+
+        for i, frame in enumerate(frames):
+            if (new_w, new_h) != (width, height):
+                cv2.resize(frame, (new_w, new_h), dst=resized, interpolation=cv2.INTER_LINEAR)
+                source = resized
+            else:
+                source = frame
+            # BGR -> RGB fusionné dans la copie vers la zone utile (la marge reste à 114)
+            padded[i, top:top + new_h, left:left + new_w] = source[..., ::-1]
+        return padded
+
+class FastPredictor:
+    # Appel direct du réseau YOLO: letterbox dans des tampons réutilisés, puis NMS
+    # d'ultralytics, sans passer par model.__call__ (fusion d'arguments, vérifications, logs).
+    # Le réseau lui-même est exécuté par un moteur de backends.py (PyTorch, ONNX Runtime...)
+    def __init__(self, backend, imgsz=640, iou=0.7):
+        self.backend = backend
+        self.letterbox = Letterbox(imgsz, backend.stride)
+        self.iou = iou
+
+    def __call__(self, frames, classes=None, conf=0.25, max_det=300, imgsz=None):
+        # Toutes les frames d'un lot ont la même taille (une même source vidéo);
+        # imgsz: plus grand côté de l'entrée du réseau, IMAGE_SIZE par défaut
+        with torch.inference_mode():
+            start = time.perf_counter()
+            batch = self.letterbox(frames, imgsz)
+            letterboxed = time.perf_counter()
+            preds = self.backend(batch)
+            inferred = time.perf_counter()
+            outputs = non_max_suppression(preds, conf, self.iou, classes=classes, max_det=max_det)
+
+            results = []
+            for output, frame in zip(outputs, frames):
+                if len(output):
+                    output[:, :4] = ops.scale_boxes(batch.shape[1:3], output[:, :4], frame.shape)
+                # Tableau (N, 6): x1, y1, x2, y2, confiance, classe
+                results.append(output.cpu().numpy())
+
+        # Durées par frame (un lot est réparti sur ses frames); sur GPU l'exécution est
+        # asynchrone: l'attente du réseau tombe dans le post-traitement (NMS, copie vers cpu)
+        count = len(frames)
+        metrics.record("preprocess", (letterboxed - start) / count)
+        metrics.record("inference", (inferred - letterboxed) / count)
+        done = time.perf_counter()
+        metrics.record("postprocess", (done - inferred) / count)
+        if tracer.enabled:
+            tracer.complete("yolo preprocess", start, letterboxed, frames=count)
+            tracer.complete("yolo inference", letterboxed, inferred, frames=count)
+            tracer.complete("yolo postprocess", inferred, done, frames=count)
+        return results
@@ -2,7 +2,7 @@ import tkinter as tk
 from tkinter import Toplevel, Canvas
 
 from ui_components import GameButton, COLORS
-from yolo_processor import process_video, stop_video, get_detected_objects_list, reset_detected_objects
+from yolo_processor import process_video, stop_video, get_detected_objects_list, reset_detected_objects, is_model_ready, start_warmup
 from dialogs import show_timeout_message, show_success_message, create_results_window
 
 class GameWindow:
@@ -179,6 +179,19 @@ class GameWindow:
                 self.app.player2_score = len(detected_objects)
                 show_timeout_message(self.window, self.app, message, lambda: self.show_game_results())
 
+    def start_timer_when_ready(self):
+        # Le chrono ne démarre qu'une fois le modèle préchauffé
+        if not hasattr(self, 'window') or not self.window.winfo_exists():
+            return
+
+        if is_model_ready():
+            self.update_timer()
+        else:
+            start_warmup()
+            if hasattr(self, 'timer_label') and self.timer_label.winfo_exists():
+                self.timer_label.config(text="Préparation du modèle...")
+            self.app.timer_id = self.window.after(100, self.start_timer_when_ready)
+
     def schedule_stop_detection(self, callback=None):
         print("Arrêt programmé de la détection...")
         self.app.timer_active = False
@@ -284,7 +297,7 @@ class GameWindow:
 
         total_objects = len(self.objects_to_detect)
         objects_found = [0]
-        self.update_timer()
+        self.start_timer_when_ready()
 
         def mark_detected(obj_name):
             var = self.object_vars.get(obj_name)
@@ -0,0 +1,42 @@
+import logging
+import threading
+import time
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s %(message)s"
+
+def setup_logging(level=logging.INFO):
+    logging.basicConfig(level=level, format=LOG_FORMAT)
+
+class RateLimitedLogger:
+    # Au plus un message par clé et par intervalle; les occurrences masquées sont comptées
+    # et signalées avec le message suivant (utile dans les boucles par frame)
+    def __init__(self, name, interval=5.0):
+        self.logger = logging.getLogger(name)
+        self.interval = interval
+        self._last = {}
+        self._suppressed = {}
+        self._lock = threading.Lock()
+
+    def log(self, level, key, message, **fields):
+        now = time.monotonic()
+        with self._lock:
+            last = self._last.get(key)
+            if last is not None and now - last < self.interval:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return
+            self._last[key] = now
+            suppressed = self._suppressed.pop(key, 0)
+
+        if suppressed:
+            fields["masques"] = suppressed
+        details = " ".join(f"{name}={value!r}" for name, value in fields.items())
+        self.logger.log(level, f"[{key}] {message} {details}".rstrip())
+
+    def info(self, key, message, **fields):
+        self.log(logging.INFO, key, message, **fields)
+
+    def warning(self, key, message, **fields):
+        self.log(logging.WARNING, key, message, **fields)
+
+    def error(self, key, message, **fields):
+        self.log(logging.ERROR, key, message, **fields)
@@ -2,8 +2,10 @@
 Point d'entrée principal de l'application
 """
 
+from log_utils import setup_logging
 from video_app import VideoApp
 
 if __name__ == "__main__":
+    setup_logging()
     app = VideoApp()
     app.run()
@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Étapes mesurées, de la capture à l'affichage (ordre d'affichage des rapports)
+STAGES = (
+    "capture", "preprocess", "inference", "postprocess", "annotate",
+    "queue_wait", "resize", "paint", "end_to_end"
+)
+
+class PipelineMetrics:
+    # Durées par étape (horloge monotone perf_counter) sur une fenêtre glissante,
+    # compteurs cumulés et débits d'événements; partagé entre threads
+    def __init__(self, window=300):
+        self.window = window
+        self._latencies = {}
+        self._counters = {}
+        self._events = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            if name not in self._latencies:
+                self._latencies[name] = deque(maxlen=self.window)
+            self._latencies[name].append(seconds)
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def tick(self, name):
+        # Horodatage d'un événement (frame affichée...) pour en déduire un débit
+        with self._lock:
+            if name not in self._events:
+                self._events[name] = deque(maxlen=self.window)
+            self._events[name].append(time.perf_counter())
+
+    def rate(self, name):
+        with self._lock:
+            events = self._events.get(name)
+            if not events or len(events) < 2 or events[-1] <= events[0]:
+                return 0.0
+            return (len(events) - 1) / (events[-1] - events[0])
+
+    def timer(self, name):
+        return _Timer(self, name)
+
+    def snapshot(self):
+        with self._lock:
+            latencies = {name: np.fromiter(samples, dtype=np.float64) for name, samples in self._latencies.items()}
+            counters = dict(self._counters)
+
+        stages = {}
+        for name, values in latencies.items():
+            if not len(values):
+                continue
+            p50, p95, p99 = np.percentile(values, (50, 95, 99)) * 1000
+            stages[name] = {"p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "samples": len(values)}
+        return {"latency": stages, "counters": counters}
+
+    def reset(self):
+        with self._lock:
+            self._latencies.clear()
+            self._counters.clear()
+            self._events.clear()
+
+class _Timer:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record(self.name, time.perf_counter() - self.start)
+        return False
+
+def format_metrics(snapshot, fps=None):
+    # Texte court pour la surimpression de VideoWindow
+    lines = [f"{'étape':<11}{'p50':>7}{'p95':>7}{'p99':>7} ms"]
+    ordered = [name for name in STAGES if name in snapshot["latency"]]
+    ordered += [name for name in snapshot["latency"] if name not in STAGES]
+    for name in ordered:
+        s = snapshot["latency"][name]
+        lines.append(f"{name:<11}{s['p50_ms']:>7.1f}{s['p95_ms']:>7.1f}{s['p99_ms']:>7.1f}")
+    for name, value in sorted(snapshot["counters"].items()):
+        lines.append(f"{name}: {value}")
+    if fps is not None:
+        lines.append(f"affichage: {fps:.1f} FPS")
+    return "\n".join(lines)
+
+# Instance unique de l'application
+metrics = PipelineMetrics()
@@ -0,0 +1,50 @@
+import json
+import os
+
+import torch
+
+from detection_cache import weights_hash
+
+# Artefacts du modèle déjà préparé (réseau fusionné, export ONNX), réutilisés d'un
+# lancement à l'autre: le .pt d'origine n'est plus relu ni reconstruit
+DEFAULT_MODEL_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "vf", "models")
+ARTIFACT_EXTENSIONS = {"pytorch": ".pt", "onnxruntime": ".onnx", "openvino": ".onnx"}
+
+class ModelArtifactCache:
+    def __init__(self, directory=DEFAULT_MODEL_CACHE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def artifact_path(self, weights_path, imgsz, backend, precision="fp32", extension=None):
+        # Clé: hash des poids + taille d'entrée + moteur (+ précision si réduite)
+        key = f"{weights_hash(weights_path)[:16]}-{imgsz}-{backend}"
+        if precision != "fp32":
+            key += f"-{precision}"
+        return os.path.join(self.directory, key + (extension or ARTIFACT_EXTENSIONS[backend]))
+
+    def read_meta(self, path):
+        # Présence du fichier de métadonnées = artefact complet (écrit en dernier)
+        try:
+            with open(path + ".json", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write_meta(self, path, stride, names=None):
+        temp_path = f"{path}.{os.getpid()}.json.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"stride": stride, "names": {str(k): v for k, v in (names or {}).items()}}, f)
+        os.replace(temp_path, path + ".json")
+
+    def save_module(self, path, net):
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        torch.save(net, temp_path)
+        os.replace(temp_path, path)
+
+    def load_module(self, path):
+        # Poids projetés en mémoire (mmap): pas de copie complète du fichier au chargement
+        return torch.load(path, mmap=True, weights_only=False, map_location="cpu")
+
+    def openvino_dir(self):
+        # Cache des modèles compilés géré par OpenVINO lui-même
+        return os.path.join(self.directory, "openvino")
@@ -0,0 +1,135 @@
+import json
+import os
+import platform
+import time
+
+import numpy as np
+
+DEFAULT_CHOICE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "vf", "model_choice.json")
+
+def measure_fps(predictor, frame, runs=5):
+    # Une inférence de chauffe hors mesure, puis débit moyen sur quelques appels
+    predictor([frame])
+    start = time.perf_counter()
+    for _ in range(runs):
+        predictor([frame])
+    return runs / (time.perf_counter() - start)
+
+def _machine_key():
+    return f"{platform.node()}|{platform.machine()}|{platform.processor()}|{os.cpu_count()}"
+
+def _read_choices(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_choices(path, choices):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(choices, f, indent=1)
+    os.replace(temp_path, path)
+
+def select_model(candidates, build, target_fps, frame_size=(480, 640), runs=5, signature="", choice_path=DEFAULT_CHOICE_PATH):
+    # Plus gros modèle (candidats du plus petit au plus gros) qui tient target_fps sur
+    # cette machine. Le choix est gardé sur disque: la mesure n'a lieu qu'une fois.
+    # Rend (modèle, prédicteur déjà construit ou None, débits mesurés par modèle)
+    key = f"{signature}|{target_fps}|{','.join(candidates)}|{_machine_key()}"
+    choices = _read_choices(choice_path)
+    saved = choices.get(key)
+    if saved and saved.get("model") in candidates:
+        return saved["model"], None, saved.get("fps", {})
+
+    print(f"Choix de la taille du modèle (cible {target_fps} FPS)...")
+    dummy = np.zeros((frame_size[0], frame_size[1], 3), dtype=np.uint8)
+    measurements = {}
+    chosen, chosen_predictor = None, None
+    unavailable = []
+    for path in candidates:
+        try:
+            predictor = build(path)
+        except Exception as e:
+            print(f"  {path}: indisponible ({e})")
+            unavailable.append(path)
+            continue
+        fps = measure_fps(predictor, dummy, runs)
+        measurements[path] = fps
+        print(f"  {path}: {fps:.1f} FPS")
+        if chosen is None or fps >= target_fps:
+            chosen, chosen_predictor = path, predictor
+        if fps < target_fps:
+            # Les modèles suivants sont plus lourds: inutile de les mesurer
+            break
+
+    if chosen is None:
+        raise RuntimeError("Aucun modèle candidat n'a pu être chargé")
+    print(f"Modèle retenu: {chosen}")
+    if unavailable:
+        # Choix faussé par un échec (téléchargement, fichier absent): nouvelle mesure au prochain lancement
+        print(f"Choix du modèle non sauvegardé: {', '.join(unavailable)} indisponible(s)")
+        return chosen, chosen_predictor, measurements
+    choices[key] = {"model": chosen, "fps": measurements}
+    try:
+        _write_choices(choice_path, choices)
+    except OSError as e:
+        print(f"Choix du modèle non sauvegardé: {e}")
+    return chosen, chosen_predictor, measurements
+
+class ModelSizeController:
+    # Passe au modèle voisin (plus petit ou plus gros) quand le débit d'inférence reste
+    # hors de la bande [low, high] pendant toute une fenêtre; pause après chaque changement
+    def __init__(self, ladder, current, band, window=5.0, cooldown=15.0, estimates=None):
+        self.ladder = list(ladder)
+        self.index = self.ladder.index(current)
+        self.low, self.high = band
+        self.window = window
+        self.cooldown = cooldown
+        # Débit connu de chaque modèle: évite de remonter vers un modèle déjà trop lent
+        self.estimates = dict(estimates or {})
+        # Modèles dont le chargement a échoué: plus proposés
+        self.unavailable = set()
+        self._samples = []
+        self._last_change = time.monotonic()
+
+    @property
+    def current(self):
+        return self.ladder[self.index]
+
+    def record(self, fps, now=None):
+        # Rend le modèle à charger, ou None; current ne change qu'à l'appel de confirm()
+        now = time.monotonic() if now is None else now
+        self._samples.append((now, fps))
+        if now - self._last_change < self.cooldown:
+            return None
+        while self._samples and now - self._samples[0][0] > self.window:
+            self._samples.pop(0)
+        if not self._samples or now - self._samples[0][0] < self.window * 0.9:
+            return None
+
+        mean_fps = sum(value for _, value in self._samples) / len(self._samples)
+        target = None
+        if mean_fps < self.low and self.index > 0:
+            target = self.index - 1
+        elif mean_fps > self.high and self.index < len(self.ladder) - 1:
+            estimate = self.estimates.get(self.ladder[self.index + 1])
+            if estimate is None or estimate >= self.low:
+                target = self.index + 1
+        if target is None or self.ladder[target] in self.unavailable:
+            return None
+
+        self.estimates[self.current] = mean_fps
+        self._samples = []
+        # Pause après chaque proposition, que l'échange réussisse ou non
+        self._last_change = now
+        return self.ladder[target]
+
+    def confirm(self, path):
+        # Modèle effectivement remplacé
+        self.index = self.ladder.index(path)
+        self._samples = []
+        self._last_change = time.monotonic()
+
+    def reject(self, path):
+        self.unavailable.add(path)
@@ -0,0 +1,152 @@
+import math
+
+import cv2
+import numpy as np
+
+class BoxPropagator:
+    # Déplace les boîtes de la dernière détection avec un flot optique épars (Lucas-Kanade)
+    def __init__(self, scale=0.5, max_points=15):
+        self.scale = scale
+        self.max_points = max_points
+        self.prev_gray = None
+        self.detections = np.zeros((0, 6), dtype=np.float32)
+
+    def _prepare(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+
+    def reset(self, frame, detections):
+        # detections: tableau (N, 6) x1, y1, x2, y2, confiance, classe
+        self.prev_gray = self._prepare(frame)
+        self.detections = np.array(detections, copy=True)
+
+    def propagate(self, frame):
+        gray = self._prepare(frame)
+        if self.prev_gray is None or not len(self.detections):
+            self.prev_gray = gray
+            return self.detections.copy()
+
+        # Points caractéristiques à l'intérieur de chaque boîte (coordonnées réduites)
+        points = []
+        owners = []
+        scaled_boxes = (self.detections[:, :4] * self.scale).astype(int)
+        for index, (x, y, x2, y2) in enumerate(scaled_boxes):
+            x, y = max(x, 0), max(y, 0)
+            roi = self.prev_gray[y:y2, x:x2]
+            if roi.shape[0] < 8 or roi.shape[1] < 8:
+                continue
+            corners = cv2.goodFeaturesToTrack(roi, self.max_points, 0.01, 3)
+            if corners is None:
+                continue
+            corners = corners.reshape(-1, 2) + (x, y)
+            points.append(corners)
+            owners.extend([index] * len(corners))
+
+        new_detections = self.detections.copy()
+        if points:
+            prev_pts = np.concatenate(points).astype(np.float32).reshape(-1, 1, 2)
+            next_pts, status, _ = cv2.calcOpticalFlowPyrLK(
+                self.prev_gray, gray, prev_pts, None, winSize=(15, 15), maxLevel=2
+            )
+            status = status.reshape(-1).astype(bool)
+            shifts = (next_pts - prev_pts).reshape(-1, 2)
+            owners = np.asarray(owners)
+
+            for index in np.unique(owners):
+                mask = (owners == index) & status
+                if not mask.any():
+                    continue
+                # Médiane des déplacements: robuste aux points mal suivis
+                dx, dy = np.median(shifts[mask], axis=0) / self.scale
+                new_detections[index, :4] += (dx, dy, dx, dy)
+
+            height, width = frame.shape[:2]
+            new_detections[:, [0, 2]] = np.clip(new_detections[:, [0, 2]], 0, width - 1)
+            new_detections[:, [1, 3]] = np.clip(new_detections[:, [1, 3]], 0, height - 1)
+
+        self.prev_gray = gray
+        self.detections = new_detections
+        return new_detections
+
+class StrideController:
+    # Choisit K (une détection complète toutes les K frames) pour tenir le débit cible
+    def __init__(self, target_fps=25, max_stride=6, alpha=0.2):
+        self.target_fps = target_fps
+        self.max_stride = max_stride
+        self.alpha = alpha
+        self.stride = 1
+        self.detect_time = None
+        self.propagate_time = None
+        self._count = 0
+
+    def should_detect(self):
+        if self._count == 0 or self._count >= self.stride:
+            self._count = 1
+            return True
+        self._count += 1
+        return False
+
+    def _smooth(self, previous, value):
+        return value if previous is None else previous + self.alpha * (value - previous)
+
+    def record_detect(self, elapsed):
+        self.detect_time = self._smooth(self.detect_time, elapsed)
+        self._update_stride()
+
+    def record_propagate(self, elapsed):
+        self.propagate_time = self._smooth(self.propagate_time, elapsed)
+
+    def _update_stride(self):
+        # Coût moyen par frame avec un pas K: (T_detect + (K-1) * T_propag) / K <= 1 / cible
+        budget = 1 / self.target_fps
+        propagate = self.propagate_time or 0.0
+        if self.detect_time <= budget:
+            self.stride = 1
+        elif propagate >= budget:
+            self.stride = self.max_stride
+        else:
+            needed = math.ceil((self.detect_time - propagate) / (budget - propagate))
+            self.stride = max(1, min(self.max_stride, needed))
+
+class MotionGate:
+    # Saute l'inférence tant que la scène ne change pas: vignette réduite en niveaux de gris
+    # comparée à celle de la dernière détection, avec une détection forcée toutes les
+    # refresh_interval frames (objet immobile apparu, dérive lente)
+    def __init__(self, threshold=0.01, pixel_delta=12, refresh_interval=30, size=(64, 48)):
+        self.threshold = threshold
+        self.pixel_delta = pixel_delta
+        self.refresh_interval = refresh_interval
+        self.size = size
+        self.reference = None
+        self.checked = 0
+        self.skipped = 0
+        self._since_refresh = 0
+
+    def _thumbnail(self, frame):
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+        # Moyenne retirée: un changement global d'exposition ne compte pas comme du mouvement
+        return gray - int(gray.mean())
+
+    def should_detect(self, frame, frames=1):
+        # frames: frames écoulées depuis la vérification précédente (pas de détection K > 1)
+        thumbnail = self._thumbnail(frame)
+        self.checked += 1
+        self._since_refresh += frames
+
+        if self.reference is not None and self._since_refresh < self.refresh_interval:
+            changed = np.count_nonzero(np.abs(thumbnail - self.reference) > self.pixel_delta)
+            if changed < self.threshold * thumbnail.size:
+                self.skipped += 1
+                return False
+
+        self.reference = thumbnail
+        self._since_refresh = 0
+        return True
+
+    def stats(self):
+        return {
+            "checked": self.checked,
+            "skipped": self.skipped,
+            "skipped_pct": 100.0 * self.skipped / self.checked if self.checked else 0.0
+        }
@@ -0,0 +1,297 @@
+import threading
+import queue
+import time
+
+from tracing import tracer
+
+# Politiques de débordement des files entre étages
+DROP_OLDEST = "drop_oldest"  # Source en direct: on garde toujours la frame la plus récente
+BLOCK = "block"              # Fichier: contre-pression, aucune frame perdue
+
+# Marqueur de fin de flux propagé d'un étage à l'autre
+END_OF_STREAM = object()
+
+class StageQueue:
+    def __init__(self, name, maxsize=2, policy=BLOCK, q=None, forward_end=True, on_put=None):
+        self.name = name
+        self.policy = policy
+        self.forward_end = forward_end
+        # Appelé après chaque dépôt (réveil du consommateur)
+        self.on_put = on_put
+        self.q = q if q is not None else queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self._fill_sum = 0
+        self._samples = 0
+
+    def put(self, item, should_stop, force=False):
+        # Échantillonnage du remplissage à chaque dépôt
+        self._fill_sum += self.q.qsize()
+        self._samples += 1
+
+        if self.policy == DROP_OLDEST or force:
+            while True:
+                try:
+                    self.q.put_nowait(item)
+                    self._notify()
+                    return True
+                except queue.Full:
+                    try:
+                        self.q.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+        while not should_stop():
+            try:
+                self.q.put(item, timeout=0.1)
+                self._notify()
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _notify(self):
+        if self.on_put is not None:
+            self.on_put()
+
+    def get(self, should_stop):
+        while not should_stop():
+            try:
+                return self.q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return END_OF_STREAM
+
+    def get_batch(self, size, should_stop, wait=0.05):
+        # Premier élément bloquant, puis on complète le lot tant que des frames arrivent
+        first = self.get(should_stop)
+        items = [first]
+        while first is not END_OF_STREAM and len(items) < size:
+            try:
+                item = self.q.get(timeout=wait)
+            except queue.Empty:
+                break
+            items.append(item)
+            if item is END_OF_STREAM:
+                break
+        return items
+
+    def fill_ratio(self):
+        if not self._samples or not self.q.maxsize:
+            return 0.0
+        return self._fill_sum / self._samples / self.q.maxsize
+
+class BatchSizeTuner:
+    # Double la taille de lot tant que le temps par frame baisse nettement
+    def __init__(self, max_size=8, samples=3, min_gain=0.1):
+        self.size = 1
+        self.max_size = max_size
+        self.samples = samples
+        self.min_gain = min_gain
+        self.best = None
+        self.done = False
+        self._times = []
+
+    def __call__(self):
+        return self.size
+
+    def record(self, count, elapsed):
+        # Les lots incomplets (fin de fichier, source lente) ne sont pas représentatifs
+        if self.done or count != self.size:
+            return
+
+        self._times.append(elapsed / count)
+        if len(self._times) < self.samples:
+            return
+
+        per_frame = sorted(self._times)[len(self._times) // 2]
+        self._times = []
+
+        if self.best is None or per_frame < self.best[1] * (1 - self.min_gain):
+            self.best = (self.size, per_frame)
+            if self.size * 2 <= self.max_size:
+                self.size *= 2
+                return
+        else:
+            self.size = self.best[0]
+
+        self.done = True
+        print(f"Taille de lot retenue: {self.size} ({1 / self.best[1]:.1f} frames/s)")
+
+class ResolutionController:
+    # Taille d'entrée du modèle ajustée pour tenir une latence d'inférence cible:
+    # descente dès que la latence lissée dépasse la cible, remontée seulement si la latence
+    # prévue au palier supérieur (proportionnelle à la surface) reste sous la cible
+    def __init__(self, sizes=(320, 416, 512, 640), target_latency=0.08, initial=None, alpha=0.3, margin=0.1, min_samples=5):
+        self.sizes = sorted(sizes)
+        self.index = self.sizes.index(initial) if initial in self.sizes else len(self.sizes) - 1
+        self.target = target_latency
+        self.alpha = alpha
+        self.margin = margin
+        self.min_samples = min_samples
+        self.latency = None
+        self._samples = 0
+
+    def __call__(self):
+        return self.sizes[self.index]
+
+    def _step(self, new_index):
+        # La latence lissée est transposée au nouveau palier pour éviter un aller-retour
+        ratio = (self.sizes[new_index] / self.sizes[self.index]) ** 2
+        self.latency *= ratio
+        self.index = new_index
+        self._samples = 0
+
+    def record(self, elapsed):
+        self.latency = elapsed if self.latency is None else self.latency + self.alpha * (elapsed - self.latency)
+        self._samples += 1
+        if self._samples < self.min_samples:
+            return
+
+        if self.latency > self.target * (1 + self.margin) and self.index > 0:
+            self._step(self.index - 1)
+        elif self.index < len(self.sizes) - 1:
+            ratio = (self.sizes[self.index + 1] / self.sizes[self.index]) ** 2
+            if self.latency * ratio < self.target * (1 - self.margin):
+                self._step(self.index + 1)
+
+def _frame_seq(item):
+    # Numéro de frame porté en tête des éléments du pipeline (seq, frame, ...)
+    if isinstance(item, tuple) and item and isinstance(item[0], int):
+        return item[0]
+    return None
+
+class PipelineStage(threading.Thread):
+    def __init__(self, name, func, input_queue, output_queue, should_stop, batch_size=None, failed=None):
+        super().__init__(name=name, daemon=True)
+        self.func = func
+        # batch_size: fonction renvoyant la taille de lot courante; func reçoit alors une liste
+        self.batch_size = batch_size
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.should_stop = should_stop
+        self.busy_time = 0.0
+        self.items = 0
+        self.start_time = None
+        self.end_time = None
+        # Exception ayant arrêté l'étage (la fin de flux est tout de même propagée)
+        self.error = None
+        # Événement partagé par le pipeline: une erreur arrête aussi les autres étages
+        self.failed = failed
+
+    def run(self):
+        self.start_time = time.perf_counter()
+        try:
+            ended = False
+            while not ended and not self.should_stop():
+                if self.batch_size is None:
+                    # Un étage sans entrée est une source (capture)
+                    waited = time.perf_counter() if tracer.enabled else None
+                    item = self.input_queue.get(self.should_stop) if self.input_queue else None
+                    if waited is not None and self.input_queue:
+                        tracer.complete(f"attente {self.input_queue.name}", waited, time.perf_counter())
+                    if item is END_OF_STREAM:
+                        break
+
+                    t0 = time.perf_counter()
+                    results = [self.func(item)]
+                    t1 = time.perf_counter()
+                    self.busy_time += t1 - t0
+                    if tracer.enabled:
+                        tracer.complete(self.name, t0, t1, seq=_frame_seq(results[0] if item is None else item))
+                else:
+                    waited = time.perf_counter() if tracer.enabled else None
+                    items = self.input_queue.get_batch(self.batch_size(), self.should_stop)
+                    if waited is not None:
+                        tracer.complete(f"attente {self.input_queue.name}", waited, time.perf_counter())
+                    if items[-1] is END_OF_STREAM:
+                        items.pop()
+                        ended = True
+                    if not items:
+                        break
+
+                    t0 = time.perf_counter()
+                    results = self.func(items)
+                    t1 = time.perf_counter()
+                    self.busy_time += t1 - t0
+                    if tracer.enabled:
+                        tracer.complete(self.name, t0, t1, seq=_frame_seq(items[0]), frames=len(items))
+
+                for result in results:
+                    if result is END_OF_STREAM:
+                        ended = True
+                        break
+                    if result is None:
+                        continue
+
+                    self.items += 1
+                    if not self.output_queue.put(result, self.should_stop):
+                        ended = True
+                        break
+        except Exception as e:
+            self.error = e
+            print(f"Erreur dans l'étage {self.name}: {e}")
+            if self.failed is not None:
+                self.failed.set()
+        finally:
+            self.end_time = time.perf_counter()
+            # En fin de fichier on attend la place (aucune frame perdue), en cas d'arrêt on force
+            if self.output_queue and self.output_queue.forward_end:
+                self.output_queue.put(END_OF_STREAM, self.should_stop, force=self.should_stop())
+
+    def occupancy(self):
+        if self.start_time is None:
+            return 0.0
+        elapsed = (self.end_time or time.perf_counter()) - self.start_time
+        return self.busy_time / elapsed if elapsed > 0 else 0.0
+
+class VideoPipeline:
+    def __init__(self, should_stop):
+        # L'erreur d'un étage arrête tout le pipeline: sans cela un étage amont resterait
+        # bloqué sur une file que plus personne ne vide
+        self.failed = threading.Event()
+        self.should_stop = lambda: self.failed.is_set() or should_stop()
+        self.stages = []
+        self.queues = []
+
+    def add_stage(self, name, func, output_queue, batch_size=None):
+        input_queue = self.queues[-1] if self.queues else None
+        stage = PipelineStage(name, func, input_queue, output_queue, self.should_stop, batch_size, self.failed)
+        self.stages.append(stage)
+        self.queues.append(output_queue)
+        return stage
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+
+    def join(self):
+        for stage in self.stages:
+            stage.join()
+
+    def error(self):
+        # Premier étage arrêté par une erreur: (nom, exception), None si aucun
+        for stage in self.stages:
+            if stage.error is not None:
+                return stage.name, stage.error
+        return None
+
+    def stats(self):
+        return {
+            "stages": {
+                stage.name: {"occupancy": stage.occupancy(), "items": stage.items}
+                for stage in self.stages
+            },
+            "queues": {
+                q.name: {"fill": q.fill_ratio(), "dropped": q.dropped}
+                for q in self.queues
+            }
+        }
+
+    def report(self):
+        stats = self.stats()
+        print("Occupation du pipeline:")
+        for name, s in stats["stages"].items():
+            print(f"  {name:<10} {s['occupancy']*100:5.1f}% occupé, {s['items']} frames")
+        for name, q in stats["queues"].items():
+            print(f"  file {name:<10} remplissage moyen {q['fill']*100:5.1f}%, {q['dropped']} frames abandonnées")
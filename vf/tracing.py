@@ -0,0 +1,107 @@
+import json
+import os
+import threading
+import time
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "begin")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.begin = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.complete(self.name, self.begin, time.perf_counter(), **self.args)
+        return False
+
+class Tracer:
+    # Intervalles début/fin par thread au format Chrome trace (événements "X"), à ouvrir
+    # dans Perfetto (ui.perfetto.dev) ou chrome://tracing. Désactivé, chaque point de
+    # mesure ne coûte qu'un test de self.enabled
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.max_events = 0
+        self.dropped = 0
+        self._events = []
+        self._threads = {}
+        self._origin = 0.0
+        self._lock = threading.Lock()
+
+    def start(self, path, max_events=1_000_000):
+        with self._lock:
+            self.path = path
+            self.max_events = max_events
+            self.dropped = 0
+            self._events = []
+            self._threads = {}
+            self._origin = time.perf_counter()
+            self.enabled = True
+
+    def complete(self, name, begin, end, **args):
+        # begin, end: instants time.perf_counter()
+        if not self.enabled:
+            return
+        if len(self._events) >= self.max_events:
+            self.dropped += 1
+            return
+        tid = threading.get_native_id()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        # list.append est atomique: pas de verrou sur le chemin de mesure
+        self._events.append((name, begin, end, tid, args))
+
+    def span(self, name, **args):
+        return _Span(self, name, args) if self.enabled else _NULL_SPAN
+
+    def stop(self):
+        # Écrit le fichier et désactive la trace; rend son chemin (None si inactive)
+        with self._lock:
+            if not self.enabled:
+                return None
+            self.enabled = False
+            events, threads, origin, path = self._events, self._threads, self._origin, self.path
+            self._events, self._threads = [], {}
+
+        pid = os.getpid()
+        trace = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in threads.items()
+        ]
+        for name, begin, end, tid, args in events:
+            trace.append({
+                "name": name,
+                "ph": "X",
+                "ts": (begin - origin) * 1e6,
+                "dur": (end - begin) * 1e6,
+                "pid": pid,
+                "tid": tid,
+                "args": args
+            })
+
+        temp_path = f"{path}.{pid}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+        os.replace(temp_path, path)
+        if self.dropped:
+            print(f"Trace: {self.dropped} événements ignorés (limite de {self.max_events})")
+        return path
+
+# Instance unique de l'application
+tracer = Tracer()
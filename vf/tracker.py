@@ -0,0 +1,204 @@
+import numpy as np
+
+# Poids du bruit du filtre de Kalman, relatifs à la taille de la boîte
+STD_POSITION = 1 / 20
+STD_VELOCITY = 1 / 160
+
+def iou_matrix(boxes_a, boxes_b):
+    if len(boxes_a) == 0 or len(boxes_b) == 0:
+        return np.zeros((len(boxes_a), len(boxes_b)))
+
+    x1 = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    y1 = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    x2 = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    y2 = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+def greedy_match(iou, threshold):
+    # Association gloutonne par IoU décroissante (évite une dépendance à scipy)
+    rows, cols = iou.shape
+    if iou.size == 0:
+        return [], list(range(rows)), list(range(cols))
+
+    pairs = np.argwhere(iou >= threshold)
+    order = np.argsort(-iou[pairs[:, 0], pairs[:, 1]], kind="stable")
+
+    matches = []
+    used_rows, used_cols = set(), set()
+    for row, col in pairs[order]:
+        if row in used_rows or col in used_cols:
+            continue
+        used_rows.add(row)
+        used_cols.add(col)
+        matches.append((row, col))
+
+    unmatched_rows = [r for r in range(rows) if r not in used_rows]
+    unmatched_cols = [c for c in range(cols) if c not in used_cols]
+    return matches, unmatched_rows, unmatched_cols
+
+def xyxy_to_cxcywh(boxes):
+    boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+    w = boxes[:, 2] - boxes[:, 0]
+    h = boxes[:, 3] - boxes[:, 1]
+    return np.stack([boxes[:, 0] + w / 2, boxes[:, 1] + h / 2, w, h], axis=1)
+
+def cxcywh_to_xyxy(boxes):
+    half_w = boxes[:, 2] / 2
+    half_h = boxes[:, 3] / 2
+    return np.stack([boxes[:, 0] - half_w, boxes[:, 1] - half_h, boxes[:, 0] + half_w, boxes[:, 1] + half_h], axis=1)
+
+class ByteTracker:
+    # Suivi multi-objets à la ByteTrack: Kalman à vitesse constante sur (cx, cy, w, h),
+    # association IoU en deux passes (détections sûres puis détections faibles)
+    def __init__(self, high_thresh=0.5, low_thresh=0.1, match_iou=0.3, low_match_iou=0.5, min_hits=3, max_age=30):
+        self.high_thresh = high_thresh
+        self.low_thresh = low_thresh
+        self.match_iou = match_iou
+        self.low_match_iou = low_match_iou
+        self.min_hits = min_hits
+        self.max_age = max_age
+
+        self.means = np.zeros((0, 8))
+        self.covariances = np.zeros((0, 8, 8))
+        self.ids = np.zeros(0, dtype=int)
+        self.classes = np.zeros(0, dtype=int)
+        self.confidences = np.zeros(0)
+        self.hits = np.zeros(0, dtype=int)
+        self.since_update = np.zeros(0, dtype=int)
+        self.confirmed = np.zeros(0, dtype=bool)
+
+        self.next_id = 1
+        self.total_confirmed = 0
+
+    def _noise(self, sizes, weight):
+        # Écart-type proportionnel à (w, h, w, h) de chaque piste
+        std = weight * np.concatenate([sizes, sizes], axis=1)
+        return std ** 2
+
+    def _predict(self, frames_elapsed):
+        if not len(self.ids):
+            return
+
+        dt = frames_elapsed
+        transition = np.eye(8)
+        transition[:4, 4:] = np.eye(4) * dt
+
+        sizes = self.means[:, 2:4]
+        q_diag = np.concatenate([self._noise(sizes, STD_POSITION), self._noise(sizes, STD_VELOCITY)], axis=1) * dt
+        process_noise = np.zeros_like(self.covariances)
+        process_noise[:, np.arange(8), np.arange(8)] = q_diag
+
+        self.means = self.means @ transition.T
+        self.means[:, 2:4] = np.maximum(self.means[:, 2:4], 1.0)
+        self.covariances = transition @ self.covariances @ transition.T + process_noise
+
+    def _correct(self, indices, measurements):
+        means = self.means[indices]
+        covariances = self.covariances[indices]
+
+        r_diag = self._noise(means[:, 2:4], STD_POSITION)
+        innovation_cov = covariances[:, :4, :4].copy()
+        innovation_cov[:, np.arange(4), np.arange(4)] += r_diag
+
+        gain = covariances[:, :, :4] @ np.linalg.inv(innovation_cov)
+        residual = measurements - means[:, :4]
+        self.means[indices] = means + (gain @ residual[:, :, None])[:, :, 0]
+        self.covariances[indices] = covariances - gain @ covariances[:, :4, :]
+
+    def _spawn(self, measurements, classes, confidences):
+        count = len(measurements)
+        if not count:
+            return
+
+        means = np.concatenate([measurements, np.zeros((count, 4))], axis=1)
+        sizes = measurements[:, 2:4]
+        p_diag = np.concatenate([self._noise(sizes, 2 * STD_POSITION), self._noise(sizes, 10 * STD_VELOCITY)], axis=1)
+        covariances = np.zeros((count, 8, 8))
+        covariances[:, np.arange(8), np.arange(8)] = p_diag
+
+        self.means = np.concatenate([self.means, means])
+        self.covariances = np.concatenate([self.covariances, covariances])
+        self.ids = np.concatenate([self.ids, np.arange(self.next_id, self.next_id + count)])
+        self.next_id += count
+        self.classes = np.concatenate([self.classes, classes])
+        self.confidences = np.concatenate([self.confidences, confidences])
+        self.hits = np.concatenate([self.hits, np.ones(count, dtype=int)])
+        self.since_update = np.concatenate([self.since_update, np.zeros(count, dtype=int)])
+        self.confirmed = np.concatenate([self.confirmed, np.zeros(count, dtype=bool)])
+
+    def _associate(self, track_indices, det_boxes, det_classes, threshold):
+        iou = iou_matrix(cxcywh_to_xyxy(self.means[track_indices, :4]), det_boxes)
+        # Une piste ne change jamais de classe
+        iou[self.classes[track_indices][:, None] != det_classes[None, :]] = 0
+        matches, unmatched_tracks, unmatched_dets = greedy_match(iou, threshold)
+        matches = [(track_indices[t], d) for t, d in matches]
+        return matches, [track_indices[t] for t in unmatched_tracks], unmatched_dets
+
+    def update(self, boxes, classes, confidences, frames_elapsed=1):
+        boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+        classes = np.asarray(classes, dtype=int).reshape(-1)
+        confidences = np.asarray(confidences, dtype=float).reshape(-1)
+
+        self._predict(frames_elapsed)
+
+        high = confidences >= self.high_thresh
+        low = ~high & (confidences >= self.low_thresh)
+        high_idx = np.flatnonzero(high)
+        low_idx = np.flatnonzero(low)
+
+        # Passe 1: toutes les pistes contre les détections sûres
+        all_tracks = np.arange(len(self.ids))
+        matches, remaining_tracks, unmatched_high = self._associate(
+            all_tracks, boxes[high_idx], classes[high_idx], self.match_iou
+        )
+        matches = [(t, high_idx[d]) for t, d in matches]
+
+        # Passe 2: pistes restantes contre les détections faibles (objets partiellement masqués)
+        remaining_tracks = np.asarray(remaining_tracks, dtype=int)
+        low_matches, _, _ = self._associate(
+            remaining_tracks, boxes[low_idx], classes[low_idx], self.low_match_iou
+        )
+        matches += [(t, low_idx[d]) for t, d in low_matches]
+
+        matched = np.zeros(len(self.ids), dtype=bool)
+        if matches:
+            track_indices = np.array([t for t, _ in matches])
+            det_indices = np.array([d for _, d in matches])
+            self._correct(track_indices, xyxy_to_cxcywh(boxes[det_indices]))
+            self.confidences[track_indices] = confidences[det_indices]
+            matched[track_indices] = True
+
+        self.hits = np.where(matched, self.hits + 1, np.where(self.confirmed, self.hits, 0))
+        self.since_update = np.where(matched, 0, self.since_update + frames_elapsed)
+
+        # Confirmation des pistes stables
+        newly = ~self.confirmed & (self.hits >= self.min_hits)
+        newly_confirmed = list(zip(self.ids[newly].tolist(), self.classes[newly].tolist()))
+        self.confirmed |= newly
+        self.total_confirmed += len(newly_confirmed)
+
+        # Suppression: pistes perdues trop longtemps, ou candidates non revues
+        keep = (self.since_update <= self.max_age) & (self.confirmed | (self.since_update == 0))
+        if not keep.all():
+            for name in ("means", "covariances", "ids", "classes", "confidences", "hits", "since_update", "confirmed"):
+                setattr(self, name, getattr(self, name)[keep])
+
+        # Nouvelles pistes à partir des détections sûres non associées
+        new_idx = high_idx[unmatched_high]
+        self._spawn(xyxy_to_cxcywh(boxes[new_idx]), classes[new_idx], confidences[new_idx])
+        if self.min_hits <= 1 and len(new_idx):
+            self.confirmed[-len(new_idx):] = True
+            self.total_confirmed += len(new_idx)
+            newly_confirmed += list(zip(self.ids[-len(new_idx):].tolist(), classes[new_idx].tolist()))
+
+        return newly_confirmed
+
+    def active_tracks(self):
+        # Pistes confirmées vues à la dernière mise à jour: (id, classe, boîte xyxy, confiance)
+        visible = self.confirmed & (self.since_update == 0)
+        boxes = cxcywh_to_xyxy(self.means[visible, :4]).astype(int)
+        return list(zip(self.ids[visible].tolist(), self.classes[visible].tolist(), boxes, self.confidences[visible].tolist()))
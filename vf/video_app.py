@@ -8,6 +8,7 @@ from ui_components import GameButton, CircleIconButton, COLORS, load_icon
 from game_manager import GameManager
 from video_window import VideoWindow
 from dialogs import show_ready_dialog
+from yolo_processor import start_warmup
 
 class VideoApp:
     def __init__(self):
@@ -49,6 +50,9 @@ class VideoApp:
         self.load_all_icons()
         self.create_main_window()
 
+        # Préchauffage du modèle en arrière-plan une fois le menu affiché
+        self.root.after(200, start_warmup)
+
     def load_all_icons(self):
         icon_files = {
             "play": "play.png",
@@ -3,7 +3,12 @@ from tkinter import Toplevel, Canvas, ttk
 import os
 
 from ui_components import GameButton, COLORS
-from yolo_processor import process_video, stop_video, toggle_pause
+from yolo_processor import (
+    process_video, stop_video, toggle_pause,
+    get_confidence_threshold, set_confidence_threshold, get_filter_preview, get_metrics,
+    RAW_CONFIDENCE_FLOOR, METRICS_OVERLAY, METRICS_REFRESH_MS
+)
+from metrics import format_metrics
 from confetti_effect import create_confetti_effect
 
 class VideoWindow:
@@ -87,6 +92,18 @@ class VideoWindow:
         )
         self.canvas.pack()
 
+        # Surimpression des latences par étape (p50/p95/p99), masquée par défaut
+        self.metrics_label = tk.Label(
+            video_frame,
+            text="",
+            font=("Courier", 9),
+            justify=tk.LEFT,
+            anchor=tk.NW,
+            bg=COLORS["dark_bg"],
+            fg=COLORS["light_text"]
+        )
+        self.show_metrics = METRICS_OVERLAY
+
         # Barre de progression
         progress_frame = tk.Frame(self.window, bg=COLORS["background"])
         progress_frame.pack(fill=tk.X, padx=50, pady=(5, 15))
@@ -143,6 +160,16 @@ class VideoWindow:
         )
         btn_return.pack(side=tk.LEFT, padx=10)
 
+        self.btn_metrics = GameButton(
+            control_frame,
+            text="📊 Masquer les mesures" if self.show_metrics else "📊 Mesures",
+            command=self.toggle_metrics,
+            width=20,
+            height=1,
+            color=COLORS["primary"]
+        )
+        self.btn_metrics.pack(side=tk.LEFT, padx=10)
+
         # Indicateurs
         stats_frame = tk.Frame(self.window, bg=COLORS["background"], pady=10)
         stats_frame.pack()
@@ -174,6 +201,68 @@ class VideoWindow:
         )
         self.fps_label.pack(side=tk.LEFT, padx=20)
 
+        # Taille d'entrée du modèle (ajustée en direct selon la charge)
+        self.resolution_label = tk.Label(
+            stats_frame,
+            text="Entrée: -",
+            font=("Helvetica", 11),
+            bg=COLORS["background"],
+            fg=COLORS["text"]
+        )
+        self.resolution_label.pack(side=tk.LEFT, padx=(0, 20))
+
+        # Seuil de confiance réglable en direct (aucune inférence supplémentaire)
+        threshold_frame = tk.Frame(stats_frame, bg=COLORS["background"])
+        threshold_frame.pack(side=tk.LEFT, padx=20)
+
+        self.threshold_scale = tk.Scale(
+            threshold_frame,
+            from_=RAW_CONFIDENCE_FLOOR,
+            to=0.95,
+            resolution=0.05,
+            orient=tk.HORIZONTAL,
+            length=250,
+            label="Seuil de confiance",
+            font=("Helvetica", 10),
+            bg=COLORS["background"],
+            fg=COLORS["text"],
+            highlightthickness=0,
+            command=self.on_threshold_change
+        )
+        self.threshold_scale.set(get_confidence_threshold())
+        self.threshold_scale.pack(side=tk.LEFT, padx=10)
+
+        self.threshold_label = tk.Label(
+            threshold_frame,
+            text="",
+            font=("Helvetica", 10),
+            bg=COLORS["background"],
+            fg=COLORS["text"]
+        )
+        self.threshold_label.pack(side=tk.LEFT, padx=10)
+
+    def toggle_metrics(self):
+        self.show_metrics = not self.show_metrics
+        self.btn_metrics.config(text="📊 Masquer les mesures" if self.show_metrics else "📊 Mesures")
+        if self.show_metrics:
+            self.update_metrics()
+        else:
+            self.metrics_label.place_forget()
+
+    def update_metrics(self):
+        if not self.show_metrics or not self.window.winfo_exists():
+            return
+        snapshot = get_metrics()
+        self.metrics_label.config(text=format_metrics(snapshot, snapshot["display_fps"]))
+        self.metrics_label.place(x=8, y=8)
+        self.window.after(METRICS_REFRESH_MS, self.update_metrics)
+
+    def on_threshold_change(self, value):
+        set_confidence_threshold(float(value))
+        detections, frames = get_filter_preview()
+        if frames:
+            self.threshold_label.config(text=f"{detections} détections sur les {frames} dernières frames")
+
     def start_analysis(self):
         # Variables d'état
         self.last_detected_count = [0]
@@ -211,7 +300,9 @@ class VideoWindow:
                     self.detection_label,
                     self.fps_label,
                     self.progress,
-                    self.objects_to_detect
+                    self.objects_to_detect,
+                    resolution_label=self.resolution_label,
+                    raw_detections=True
                 )
             else:
                 process_video(
@@ -220,7 +311,12 @@ class VideoWindow:
                     self.window,
                     self.detection_label,
                     self.fps_label,
-                    self.progress
+                    self.progress,
+                    resolution_label=self.resolution_label,
+                    raw_detections=True
                 )
         except Exception as e:
             print(f"Erreur lors du démarrage du traitement vidéo: {e}")
+
+        if self.show_metrics:
+            self.update_metrics()
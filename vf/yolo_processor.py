@@ -1,30 +1,320 @@
 import cv2
-import datetime
+import functools
+import logging
 import numpy as np
+import os
 import tkinter as tk
 from PIL import Image, ImageTk
-from ultralytics import YOLO
 import threading
 import queue
 import time
 
+from coco_classes import COCO_CLASSES, COCO_NAME_TO_ID
+from detection_cache import RawDetectionBuffer
+from log_utils import RateLimitedLogger
+from metrics import metrics
+from tracing import tracer
+from motion import BoxPropagator, MotionGate, StrideController
+from tracker import ByteTracker
+from pipeline import VideoPipeline, StageQueue, BatchSizeTuner, ResolutionController, DROP_OLDEST, BLOCK, END_OF_STREAM
+
 # Configuration globale
 CONFIDENCE_THRESHOLD_LIMIT = 0.5
-DEVICE = "mps"  # Options: "mps" (Mac GPU), "cuda" (NVIDIA GPU), "cpu"
+MAX_DETECTIONS = 100  # Limite par frame passée à la NMS (300 par défaut dans ultralytics)
+NMS_IOU_THRESHOLD = 0.7  # Recouvrement au-delà duquel la NMS fusionne deux boîtes (ultralytics: 0.7)
+DEVICE = "auto"  # Options: "auto", "mps" (Mac GPU), "cuda" (NVIDIA GPU), "cpu" (moteur pytorch)
+BACKEND = "pytorch"  # Options: "pytorch", "onnxruntime" (cpu), "openvino" (cpu)
+INFERENCE_THREADS = 0  # Cœurs alloués à ONNX Runtime / OpenVINO (0: choix du moteur)
+MODEL_PATH = "yolov8m.pt"
+IMAGE_SIZE = 640  # Plus grand côté de l'entrée du réseau (letterbox rectangulaire)
+
+# Direct: taille d'entrée ajustée parmi RESOLUTION_STEPS pour tenir TARGET_INFERENCE_LATENCY
+# (secondes par détection); les fichiers restent à IMAGE_SIZE
+ADAPTIVE_RESOLUTION = True
+RESOLUTION_STEPS = (320, 416, 512, 640)
+TARGET_INFERENCE_LATENCY = 0.08
+
+# Taille du modèle: en "auto", une courte mesure au premier lancement retient le plus gros
+# des MODEL_CANDIDATES qui tient MODEL_TARGET_FPS d'inférence (choix gardé sur disque);
+# "fixed" utilise MODEL_PATH. En direct, le modèle est remplacé à chaud par son voisin
+# quand le débit d'inférence sort durablement de MODEL_FPS_BAND
+MODEL_SELECTION = "auto"
+MODEL_CANDIDATES = ("yolov8n.pt", "yolov8s.pt", "yolov8m.pt")
+MODEL_TARGET_FPS = 12
+MODEL_HOT_SWAP = True
+MODEL_FPS_BAND = (8, 30)
+
+# Précision du calcul sur cpu: "fp32", "bf16" (pytorch, openvino), "int8-dynamic" (onnxruntime)
+# ou "int8-static" (onnxruntime, openvino; calibré sur CALIBRATION_FRAMES frames de
+# CALIBRATION_VIDEO). Vérifier l'écart au fp32 avant usage: python benchmark.py precision
+PRECISION = "fp32"
+CALIBRATION_VIDEO = None
+CALIBRATION_FRAMES = 32
+
+# Cache des artefacts du modèle (réseau fusionné ou export ONNX selon le moteur), clé:
+# hash des poids + taille d'entrée + moteur; les lancements suivants les chargent directement
+MODEL_CACHE = True
+MODEL_CACHE_DIR = None  # None: ~/.cache/vf/models
+
+# Cache disque des détections brutes des fichiers vidéo: une vidéo déjà analysée
+# est rejouée sans appeler le modèle. Les détections brutes (toutes classes, au-dessus
+# de RAW_CONFIDENCE_FLOOR) sont filtrées ensuite, comme en sortie du modèle
+DETECTION_CACHE = True
+DETECTION_CACHE_MAX_BYTES = 512 * 1024 * 1024
+RAW_CONFIDENCE_FLOOR = 0.1
+RAW_MAX_DETECTIONS = 300
+
+# Détections brutes des dernières frames gardées en mémoire pendant une session, pour
+# l'aperçu du seuil (détections retenues sur ces frames, environ 5 s de vidéo). La frame
+# affichée, même en pause, est redessinée depuis ses propres détections brutes
+RAW_BUFFER_FRAMES = 150
+
+# Inférence par lots pour les fichiers vidéo: un entier, ou "auto" pour ajuster
+# la taille selon la latence mesurée (les webcams restent à une frame par appel)
+FILE_BATCH_SIZE = "auto"
+MAX_BATCH_SIZE = 8
+
+# Webcam: détection complète toutes les K frames seulement, K ajusté pour tenir
+# le débit d'affichage cible; les boîtes sont propagées par flot optique entre deux
+ADAPTIVE_STRIDE = True
+TARGET_DISPLAY_FPS = 25
+MAX_STRIDE = 6
+
+# Webcam: l'inférence est sautée (détections précédentes réutilisées) tant que moins de
+# MOTION_THRESHOLD des pixels d'une vignette réduite changent de plus de MOTION_PIXEL_DELTA;
+# une détection reste forcée toutes les MOTION_REFRESH_FRAMES frames
+MOTION_GATE = True
+MOTION_THRESHOLD = 0.01
+MOTION_PIXEL_DELTA = 12
+MOTION_REFRESH_FRAMES = 30
+
+# Latences par étape (capture -> affichage) en p50/p95/p99 sur les METRICS_WINDOW dernières
+# mesures (voir get_metrics); surimpression dans la fenêtre vidéo, rafraîchie toutes les
+# METRICS_REFRESH_MS millisecondes
+METRICS_WINDOW = 300
+METRICS_OVERLAY = False
+METRICS_REFRESH_MS = 500
+
+# Rafraîchissement de l'interface: au plus DISPLAY_MAX_FPS images par seconde (fréquence
+# de l'écran), étiquettes (FPS, détections) mises à jour toutes les LABEL_REFRESH_INTERVAL s
+DISPLAY_MAX_FPS = 60
+LABEL_REFRESH_INTERVAL = 0.25
+
+# Interpolation de la mise à l'échelle des frames vers le canvas (thread de rendu)
+DISPLAY_INTERPOLATION = cv2.INTER_LINEAR
+
+# Boîtes et étiquettes dessinées après la mise à l'échelle, à la résolution d'affichage;
+# étiquettes pré-rendues gardées en cache (LABEL_SPRITE_CACHE au plus).
+# ANNOTATE_FRAMES = False: aucune annotation (exécutions sans affichage)
+ANNOTATE_FRAMES = True
+LABEL_FONT = cv2.FONT_HERSHEY_SIMPLEX
+LABEL_FONT_SCALE = 0.5
+LABEL_SPRITE_CACHE = 2048
+
+# Trace Chrome (Perfetto) de chaque session vidéo: intervalles début/fin des étages du
+# pipeline et de update_ui, par thread et numéro de frame. None: désactivée
+TRACE_PATH = None  # Ex.: "vf_trace.json", à ouvrir dans ui.perfetto.dev
+
+# Suivi multi-objets: un objet n'est compté qu'une fois sa piste confirmée
+# (TRACK_MIN_HITS détections consécutives), ce qui élimine les détections fugitives
+TRACKING = True
+TRACK_MIN_HITS = 3
+TRACK_LOW_THRESHOLD = 0.1
 
-# Initialisation du modèle
-print("Chargement du modèle YOLO...")
-model = YOLO("yolov8m.pt")
-print("Modèle YOLO chargé!")
+# Le modèle est chargé paresseusement au premier appel de process_frame
+# (l'import de torch/ultralytics et le chargement des poids coûtent plusieurs secondes)
+model = None
+predictor = None
+_model_lock = threading.Lock()
+_predictor_lock = threading.Lock()
+_model_fps_estimates = {}
+_swap_thread = None
+
+# Préchauffage: quelques inférences factices à la résolution webcam (hauteur, largeur)
+WARMUP_RUNS = 3
+WARMUP_SIZE = (480, 640)
+model_ready = threading.Event()
+warmup_time = None
+_warmup_thread = None
+_warmup_lock = threading.Lock()
+
+# Colonnes du tableau de détections (format boxes.data d'ultralytics)
+BOX_X1, BOX_Y1, BOX_X2, BOX_Y2, BOX_CONF, BOX_CLS = range(6)
+EMPTY_DETECTIONS = np.zeros((0, 6), dtype=np.float32)
 
 # Variables de contrôle
 stop_detection = False
 _paused = False
 processing_lock = threading.Lock()
 detection_thread = None
+_pipeline = None
+_tracker = None
+_resolution = None
+_motion_gate = None
+_detection_cache = None
+_detection_buffer = None
+_object_filter = None
+_display_threshold = None  # Seuil réglé en cours de session (None: CONFIDENCE_THRESHOLD_LIMIT)
+_last_render = None
+_display_size = None
+_label_sprites = {}
 frame_queue = queue.Queue(maxsize=1)
+_frame_ready = threading.Event()  # Signalé à chaque frame déposée pour l'interface
+_ui_session = 0  # Numéro de la session d'affichage courante (process_video)
 detected_objects_set = set()
 
+# Journalisation limitée pour les erreurs survenant à chaque frame
+log = RateLimitedLogger("vf.yolo")
+
+def _load_yolo(path):
+    print(f"Chargement du modèle YOLO {path}...")
+    from ultralytics import YOLO
+    from ultralytics.utils import LOGGER
+    # Pas de sortie console d'ultralytics à chaque frame
+    LOGGER.setLevel(logging.WARNING)
+    loaded = YOLO(path)
+    if dict(loaded.names) != COCO_CLASSES:
+        print("Attention: les classes du modèle diffèrent de la table COCO statique")
+    print("Modèle YOLO chargé!")
+    return loaded
+
+def get_model():
+    global model
+    if model is None:
+        with _model_lock:
+            if model is None:
+                model = _load_yolo(MODEL_PATH)
+    return model
+
+def get_model_cache():
+    if not MODEL_CACHE:
+        return None
+    from model_cache import ModelArtifactCache, DEFAULT_MODEL_CACHE_DIR
+    return ModelArtifactCache(MODEL_CACHE_DIR or DEFAULT_MODEL_CACHE_DIR)
+
+def get_calibration_loader():
+    if not CALIBRATION_VIDEO:
+        return None
+    from backends import read_calibration_frames
+    return lambda: read_calibration_frames(CALIBRATION_VIDEO, CALIBRATION_FRAMES)
+
+def inference_signature():
+    # Ce qui change la sortie du modèle à poids égaux (clé du cache de détections);
+    # moteur et précision effectifs une fois le prédicteur créé (repli possible)
+    name, precision = (predictor.backend.name, predictor.backend.precision) if predictor else (BACKEND, PRECISION)
+    return name if precision == "fp32" else f"{name}-{precision}"
+
+def detection_cache_signature():
+    # Clé du cache de détections en plus de la vidéo, des poids et de la taille: tout ce
+    # qui change les détections brutes enregistrées (moteur, plancher, limite, NMS)
+    return f"{inference_signature()}|{RAW_CONFIDENCE_FLOOR}|{RAW_MAX_DETECTIONS}|{NMS_IOU_THRESHOLD}"
+
+def resolve_weights(path):
+    # Chemin local des poids: ultralytics télécharge d'abord les poids officiels absents
+    # (yolov8n.pt...), qui doivent exister sur disque avant le calcul de leur hash
+    if os.path.exists(path):
+        return path
+    from ultralytics.utils.downloads import attempt_download_asset
+    return attempt_download_asset(path)
+
+def _build_predictor(weights_path):
+    from backends import create_backend
+    from fast_predictor import FastPredictor
+
+    local_path = resolve_weights(weights_path)
+    # Le modèle YOLO d'origine n'est chargé que si l'artefact manque
+    load_model = get_model if weights_path == MODEL_PATH else functools.partial(_load_yolo, local_path)
+    backend = create_backend(
+        BACKEND, local_path, IMAGE_SIZE, DEVICE,
+        load_model=load_model, cache=get_model_cache(),
+        precision=PRECISION, calibration=get_calibration_loader(), threads=INFERENCE_THREADS
+    )
+    print(f"Moteur d'inférence: {backend.name} ({backend.precision}), modèle {weights_path}")
+    return FastPredictor(backend, imgsz=IMAGE_SIZE, iou=NMS_IOU_THRESHOLD)
+
+def get_predictor():
+    global predictor, MODEL_PATH
+    if predictor is None:
+        with _predictor_lock:
+            if predictor is None:
+                built = None
+                if MODEL_SELECTION == "auto":
+                    from model_selector import select_model
+                    chosen, built, measured = select_model(
+                        MODEL_CANDIDATES, _build_predictor, MODEL_TARGET_FPS,
+                        frame_size=WARMUP_SIZE, signature=f"{inference_signature()}|{IMAGE_SIZE}"
+                    )
+                    MODEL_PATH = chosen
+                    _model_fps_estimates.update(measured)
+                predictor = built or _build_predictor(MODEL_PATH)
+    return predictor
+
+def request_model_swap(weights_path, on_done=None):
+    # Nouveau modèle préparé en arrière-plan; l'ancien sert les frames jusqu'à l'échange.
+    # on_done(réussi) est appelé depuis le thread de préparation
+    global _swap_thread
+    if _swap_thread and _swap_thread.is_alive():
+        return False
+
+    def swap():
+        global predictor, model, MODEL_PATH
+        try:
+            start = time.perf_counter()
+            new_predictor = _build_predictor(weights_path)
+            new_predictor([np.zeros((WARMUP_SIZE[0], WARMUP_SIZE[1], 3), dtype=np.uint8)])
+            with _predictor_lock:
+                predictor = new_predictor
+                model = None
+                MODEL_PATH = weights_path
+            print(f"Modèle remplacé à chaud par {weights_path} en {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            print(f"Erreur lors du changement de modèle: {e}")
+            if on_done:
+                on_done(False)
+            return
+        if on_done:
+            on_done(True)
+
+    _swap_thread = threading.Thread(target=swap, daemon=True)
+    _swap_thread.start()
+    return True
+
+def _warmup_worker(runs, size):
+    global warmup_time
+    try:
+        start = time.perf_counter()
+        warm_predictor = get_predictor()
+        dummy = np.zeros((size[0], size[1], 3), dtype=np.uint8)
+        for _ in range(runs):
+            warm_predictor([dummy])
+        warmup_time = time.perf_counter() - start
+        print(f"Préchauffage du modèle terminé en {warmup_time:.2f}s")
+    except Exception as e:
+        print(f"Erreur lors du préchauffage du modèle: {e}")
+    finally:
+        # Même en cas d'erreur, on débloque les consommateurs (process_frame signalera l'erreur)
+        model_ready.set()
+
+def start_warmup(runs=WARMUP_RUNS, size=WARMUP_SIZE):
+    global _warmup_thread
+    with _warmup_lock:
+        if model_ready.is_set() or (_warmup_thread and _warmup_thread.is_alive()):
+            return model_ready
+        _warmup_thread = threading.Thread(
+            target=_warmup_worker,
+            args=(runs, size),
+            daemon=True
+        )
+        _warmup_thread.start()
+    return model_ready
+
+def is_model_ready():
+    return model_ready.is_set()
+
+def wait_model_ready(timeout=None):
+    start_warmup()
+    return model_ready.wait(timeout)
+
 def toggle_pause():
     global _paused
     _paused = not _paused
@@ -40,12 +330,12 @@ def reset_detected_objects():
     print("Objets détectés réinitialisés")
 
 def get_detectable_objects():
-    return list(model.names.values())
+    return list(COCO_CLASSES.values())
 
 def get_detected_objects_list():
     global detected_objects_set
     with processing_lock:
-        return [model.names[cls_id] for cls_id in detected_objects_set if cls_id in model.names]
+        return [COCO_CLASSES[cls_id] for cls_id in detected_objects_set if cls_id in COCO_CLASSES]
 
 def show_victory_message(window, objects_detected):
     try:
@@ -121,66 +411,316 @@ def show_victory_message(window, objects_detected):
     except Exception as e:
         print(f"Erreur lors de l'affichage du message de victoire: {e}")
 
-def process_frame(frame, object_ids=None, on_object_detected=None):
-    global detected_objects_set
+@functools.lru_cache(maxsize=32)
+def _class_lookup(object_ids):
+    # Tableau booléen indexé par ID de classe, calculé une fois par liste d'objets
+    lookup = np.zeros(len(COCO_CLASSES), dtype=bool)
+    if object_ids is None:
+        lookup[:] = True
+    else:
+        lookup[list(object_ids)] = True
+    return lookup
 
-    try:
-        # Mesure du temps pour calcul FPS
-        start = datetime.datetime.now()
+def _register_classes(classes, on_object_detected=None):
+    # Une seule prise du verrou par frame
+    with processing_lock:
+        new_classes = set(classes) - detected_objects_set
+        detected_objects_set.update(new_classes)
+        if on_object_detected:
+            for cls in sorted(new_classes):
+                on_object_detected(COCO_CLASSES[cls])
+
+def _update_tracks(tracker, detections, on_object_detected=None, frames_elapsed=1):
+    # Le tracker reçoit aussi les détections faibles (association en deux passes)
+    newly_confirmed = tracker.update(
+        detections[:, :4], detections[:, BOX_CLS].astype(int), detections[:, BOX_CONF], frames_elapsed
+    )
+    if not newly_confirmed:
+        return
 
-        # Analyse de l'image avec YOLO
-        result = model(frame)[0]
+    # Une notification par piste confirmée, pas par apparition fugitive
+    with processing_lock:
+        for track_id, cls in newly_confirmed:
+            detected_objects_set.add(cls)
+            if on_object_detected:
+                on_object_detected(COCO_CLASSES[cls])
 
-        # Extraction des résultats
-        bboxes = np.array(result.boxes.xyxy.cpu(), dtype="int")
-        classes = np.array(result.boxes.cls.cpu(), dtype="int")
-        confidence = np.array(result.boxes.conf.cpu(), dtype="float")
+def _filter_result(data, object_ids=None, on_object_detected=None, tracker=None, frames_elapsed=1):
+    # data: tableau (N, 6) x1, y1, x2, y2, confiance, classe
+    classes = data[:, BOX_CLS].astype(int)
 
-        detected_count = 0
-        current_frame_detections = set()
+    # Filtrage selon les objets demandés
+    wanted = _class_lookup(None if object_ids is None else tuple(object_ids))[classes]
+    # Détections relues (cache, détections brutes): même plafond que max_det dans l'appel
+    # du modèle; les lignes sont triées par confiance décroissante
+    if np.count_nonzero(wanted) > MAX_DETECTIONS:
+        wanted[np.flatnonzero(wanted)[MAX_DETECTIONS:]] = False
 
-        # Traitement de chaque détection
-        for cls, bbox, conf in zip(classes, bboxes, confidence):
-            # Filtrage selon les objets demandés
-            if object_ids is not None and cls not in object_ids:
-                continue
+    if tracker is not None:
+        _update_tracks(tracker, data[wanted], on_object_detected, frames_elapsed)
 
-            # Filtrage selon le seuil de confiance
-            if conf < CONFIDENCE_THRESHOLD_LIMIT:
-                continue
+    # Filtrage selon le seuil de confiance
+    mask = wanted & (data[:, BOX_CONF] >= get_confidence_threshold())
+    detections = data[mask]
+
+    # Gestion des nouvelles détections (déléguée au tracker s'il est actif)
+    if tracker is None and len(detections):
+        _register_classes(classes[mask].tolist(), on_object_detected)
+
+    return detections
+
+def detection_cache_applies(tracking=False):
+    # Le cache ne garde que les détections au-dessus de RAW_CONFIDENCE_FLOOR: un seuil plus
+    # bas (ou celui des détections faibles du tracker) demande une vraie inférence
+    lowest = min(CONFIDENCE_THRESHOLD_LIMIT, TRACK_LOW_THRESHOLD) if tracking else CONFIDENCE_THRESHOLD_LIMIT
+    return DETECTION_CACHE and lowest >= RAW_CONFIDENCE_FLOOR
+
+def get_detection_cache():
+    global _detection_cache
+    if _detection_cache is None:
+        from detection_cache import DetectionCache
+        _detection_cache = DetectionCache(max_bytes=DETECTION_CACHE_MAX_BYTES)
+    return _detection_cache
 
-            object_name = model.names[cls]
+def get_cache_stats():
+    return _detection_cache.stats() if _detection_cache else None
 
-            # Gestion des nouvelles détections
-            with processing_lock:
-                if cls not in detected_objects_set:
-                    detected_objects_set.add(cls)
-                    if on_object_detected:
-                        on_object_detected(object_name)
+def _raw_detections(frames, frame_indices=None, cache_session=None, imgsz=None):
+    # Détections lues dans le cache; le modèle ne tourne que sur les frames absentes
+    if cache_session is None:
+        results = [None] * len(frames)
+    else:
+        results = [cache_session.get(index) for index in frame_indices]
+    missing = [k for k, data in enumerate(results) if data is None]
+    if missing:
+        computed = get_predictor()(
+            [frames[k] for k in missing],
+            conf=RAW_CONFIDENCE_FLOOR,
+            max_det=RAW_MAX_DETECTIONS,
+            imgsz=imgsz
+        )
+        for k, data in zip(missing, computed):
+            results[k] = data
+            if cache_session is not None:
+                cache_session.put(frame_indices[k], data)
+    return results
+
+def detect_objects_batch(frames, object_ids=None, on_object_detected=None, tracker=None, frames_elapsed=1, cache_session=None, frame_indices=None, raw=False, imgsz=None, strict=False):
+    # strict: les erreurs (modèle absent, échec d'inférence) remontent à l'appelant au lieu
+    # de donner des frames sans détection (analyse hors ligne)
+    try:
+        # Mesure du temps pour calcul FPS (horloge monotone)
+        start = time.perf_counter()
 
-            # Affichage sur l'image
-            (x, y, x2, y2) = bbox
-            color = (0, 255, 0) if conf > 0.6 else (66, 224, 245) if conf > 0.3 else (78, 66, 245)
-            cv2.rectangle(frame, (x, y), (x2, y2), color, 2)
-            cv2.putText(frame, f"{object_name}: {conf:.2f}", (x, y - 5), cv2.FONT_HERSHEY_PLAIN, 2, color, 2)
+        if cache_session is not None or raw:
+            # Le cache est propre à IMAGE_SIZE: pas d'autre taille quand il est utilisé
+            results = _raw_detections(frames, frame_indices, cache_session, None if cache_session else imgsz)
+        else:
+            # Analyse de toutes les images en un seul appel YOLO; classes et seuil sont
+            # appliqués avant la NMS (le tracker a besoin des détections faibles)
+            results = get_predictor()(
+                frames,
+                classes=list(object_ids) if object_ids is not None else None,
+                conf=min(CONFIDENCE_THRESHOLD_LIMIT, TRACK_LOW_THRESHOLD) if tracker is not None else CONFIDENCE_THRESHOLD_LIMIT,
+                max_det=MAX_DETECTIONS,
+                imgsz=imgsz
+            )
 
-            detected_count += 1
-            current_frame_detections.add(cls)
+        outputs = []
+        for data in results:
+            detections = _filter_result(data, object_ids, on_object_detected, tracker, frames_elapsed)
+            # raw: détections avant seuil (le filtre n'a servi qu'au suivi et au comptage)
+            outputs.append((data if raw else detections, len(detected_objects_set)))
 
-        # Calcul et affichage du FPS
-        end = datetime.datetime.now()
-        fps = 1 / (end - start).total_seconds()
-        cv2.putText(frame, f"FPS: {fps:.2f}", (50, 50), cv2.FONT_HERSHEY_PLAIN, 1, (0, 0, 255), 2)
+        # Calcul du FPS (frames traitées par seconde sur le lot)
+        fps = len(frames) / (time.perf_counter() - start)
 
-        return frame, fps, detected_count, len(detected_objects_set)
+        return [(detections, fps, total_detected) for detections, total_detected in outputs]
     except Exception as e:
-        print(f"Erreur lors du traitement de la frame: {e}")
-        return frame, 0, 0, 0
+        if strict:
+            raise
+        log.error("frame", "Erreur lors du traitement de la frame", erreur=str(e))
+        return [(EMPTY_DETECTIONS, 0, 0) for _ in frames]
+
+def detect_objects(frame, object_ids=None, on_object_detected=None, tracker=None, frames_elapsed=1, raw=False, imgsz=None):
+    return detect_objects_batch([frame], object_ids, on_object_detected, tracker, frames_elapsed, raw=raw, imgsz=imgsz)[0]
+
+def select_detections(data, object_ids=None, conf=None):
+    # Filtre d'affichage appliqué aux détections brutes (classes puis seuil)
+    if conf is None:
+        conf = get_confidence_threshold()
+    if not len(data):
+        return data
+    wanted = _class_lookup(None if object_ids is None else tuple(object_ids))[data[:, BOX_CLS].astype(int)]
+    return data[wanted & (data[:, BOX_CONF] >= conf)][:MAX_DETECTIONS]
+
+def _label_sprite(text, color):
+    # Étiquette pré-rendue (texte noir sur fond de la couleur de la boîte), réutilisée
+    # d'une frame à l'autre: une par classe et couleur, une par score et couleur
+    key = (text, color)
+    sprite = _label_sprites.get(key)
+    if sprite is None:
+        (width, height), baseline = cv2.getTextSize(text, LABEL_FONT, LABEL_FONT_SCALE, 1)
+        sprite = np.empty((height + baseline + 4, width + 4, 3), dtype=np.uint8)
+        sprite[:] = color
+        cv2.putText(sprite, text, (2, height + 2), LABEL_FONT, LABEL_FONT_SCALE, (0, 0, 0), 1, cv2.LINE_AA)
+        if len(_label_sprites) >= LABEL_SPRITE_CACHE:
+            _label_sprites.clear()
+        _label_sprites[key] = sprite
+    return sprite
+
+def _blit(frame, sprite, x, y):
+    # Copie de l'étiquette, coin haut-gauche en (x, y), découpée aux bords de l'image
+    height, width = sprite.shape[:2]
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + width, frame.shape[1]), min(y + height, frame.shape[0])
+    if x1 > x0 and y1 > y0:
+        frame[y0:y1, x0:x1] = sprite[y0 - y:y1 - y, x0 - x:x1 - x]
 
-def video_processing_thread(video_source, on_object_detected=None, object_ids=None):
-    global stop_detection, _paused
+def annotate_frame(frame, detections, fps, rgb=False, scale=(1.0, 1.0)):
+    # Affichage sur l'image (couleurs définies en BGR, inversées si l'image est en RGB);
+    # scale: rapport (largeur, hauteur) entre l'image annotée et la frame détectée
+    order = slice(None, None, -1) if rgb else slice(None)
+    # Compteur dessiné en premier: les étiquettes restent lisibles par-dessus
+    cv2.putText(frame, f"FPS: {fps:.2f}", (10, 20), LABEL_FONT, LABEL_FONT_SCALE, (0, 0, 255)[order], 1, cv2.LINE_AA)
+    boxes = (detections[:, :4] * np.array(scale * 2, dtype=np.float32)).astype(int).tolist()
+    for (x, y, x2, y2), conf, cls in zip(boxes, detections[:, BOX_CONF].tolist(), detections[:, BOX_CLS].astype(int).tolist()):
+        color = ((0, 255, 0) if conf > 0.6 else (66, 224, 245) if conf > 0.3 else (78, 66, 245))[order]
+        cv2.rectangle(frame, (x, y), (x2, y2), color, 2)
+        name = _label_sprite(COCO_CLASSES[cls], color)
+        score = _label_sprite(f"{conf:.2f}", color)
+        # Au-dessus de la boîte, ou dedans si la boîte touche le haut de l'image
+        top = y - name.shape[0] if y >= name.shape[0] else y
+        _blit(frame, name, x, top)
+        _blit(frame, score, x + name.shape[1], top)
+    return frame
 
+def set_display_size(width, height):
+    # Taille du canvas d'affichage, transmise par l'interface (événements <Configure>)
+    global _display_size
+    if width > 1 and height > 1:
+        _display_size = (width, height)
+
+def get_display_size(width, height):
+    # Taille de la frame affichée: ajustée au canvas, proportions gardées
+    if _display_size is None:
+        return width, height
+    ratio = min(_display_size[0] / width, _display_size[1] / height)
+    return max(1, int(width * ratio)), max(1, int(height * ratio))
+
+def render_display_frame(frame, data, fps, total_detected, seq=None, captured_at=None):
+    # Image RGB à la taille du canvas, annotée après réduction (texte lisible, coût
+    # indépendant de la résolution source); la frame BGR d'origine reste intacte.
+    # Le dernier élément identifie la frame (numéro, capture, rendu) pour les mesures de l'interface
+    start = time.perf_counter()
+    detections = select_detections(data, _object_filter)
+    height, width = frame.shape[:2]
+    size = get_display_size(width, height)
+    if size != (width, height):
+        display_frame = cv2.resize(frame, size, interpolation=DISPLAY_INTERPOLATION)
+        # BGR -> RGB en place, sur l'image déjà réduite
+        cv2.cvtColor(display_frame, cv2.COLOR_BGR2RGB, dst=display_frame)
+    else:
+        display_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    resized = time.perf_counter()
+    metrics.record("resize", resized - start)
+
+    if ANNOTATE_FRAMES:
+        annotate_frame(display_frame, detections, fps, rgb=True, scale=(size[0] / width, size[1] / height))
+    rendered_at = time.perf_counter()
+    metrics.record("annotate", rendered_at - resized)
+    return display_frame, fps, len(detections), total_detected, (seq, captured_at, rendered_at)
+
+def refresh_display():
+    # Nouveau rendu de la dernière frame avec les filtres courants, sans inférence
+    if _last_render is None:
+        return False
+    rendered = render_display_frame(*_last_render)
+    while True:
+        try:
+            frame_queue.put_nowait(rendered)
+            _frame_ready.set()
+            return True
+        except queue.Full:
+            try:
+                frame_queue.get_nowait()
+                metrics.count("dropped_refresh")
+            except queue.Empty:
+                pass
+
+def get_confidence_threshold():
+    return CONFIDENCE_THRESHOLD_LIMIT if _display_threshold is None else _display_threshold
+
+def set_confidence_threshold(value):
+    # Seuil propre à la session en cours (remis à CONFIDENCE_THRESHOLD_LIMIT par process_video)
+    global _display_threshold
+    _display_threshold = max(float(value), RAW_CONFIDENCE_FLOOR)
+    if _tracker is not None:
+        _tracker.high_thresh = _display_threshold
+    refresh_display()
+
+def set_object_filter(objects_to_detect):
+    global _object_filter
+    if objects_to_detect:
+        _object_filter = [COCO_NAME_TO_ID[obj] for obj in objects_to_detect if obj in COCO_NAME_TO_ID]
+    else:
+        _object_filter = None
+    refresh_display()
+
+def get_filter_preview(conf=None):
+    # Détections retenues par un seuil sur les frames en mémoire: (détections, frames)
+    if _detection_buffer is None:
+        return 0, 0
+    class_mask = _class_lookup(None if _object_filter is None else tuple(_object_filter))
+    return _detection_buffer.count(class_mask, get_confidence_threshold() if conf is None else conf)
+
+def process_frame(frame, object_ids=None, on_object_detected=None, imgsz=None):
+    detections, fps, total_detected = detect_objects(frame, object_ids, on_object_detected, imgsz=imgsz)
+    if ANNOTATE_FRAMES:
+        annotate_frame(frame, detections, fps)
+    return frame, fps, len(detections), total_detected
+
+def get_active_tracks():
+    return _tracker.active_tracks() if _tracker else []
+
+def get_distinct_object_count():
+    return _tracker.total_confirmed if _tracker else len(detected_objects_set)
+
+def get_inference_size():
+    # Taille d'entrée courante du réseau (ajustée en direct, IMAGE_SIZE sinon)
+    return _resolution() if _resolution else IMAGE_SIZE
+
+def get_motion_stats():
+    # Part des inférences évitées par le filtre de mouvement (session en direct)
+    return _motion_gate.stats() if _motion_gate else None
+
+def get_pipeline_stats():
+    return _pipeline.stats() if _pipeline else None
+
+def get_metrics():
+    # Latences p50/p95/p99 par étape (ms), frames jetées par file et débit d'affichage
+    snapshot = metrics.snapshot()
+    if _pipeline is not None:
+        for name, queue_stats in _pipeline.stats()["queues"].items():
+            snapshot["counters"][f"dropped_{name}"] = queue_stats["dropped"]
+    if _motion_gate is not None:
+        snapshot["counters"]["skipped_static"] = _motion_gate.stats()["skipped"]
+    snapshot["display_fps"] = metrics.rate("display")
+    return snapshot
+
+def video_processing_thread(video_source, on_object_detected=None, object_ids=None, raw_detections=False):
+    # raw_detections: toutes classes au-dessus de RAW_CONFIDENCE_FLOOR, filtrées à l'affichage
+    # (seuil et classes réglables en direct); sinon classes et seuil passés au modèle
+    global _pipeline, _tracker, _resolution, _motion_gate, _detection_buffer, _object_filter, _last_render
+
+    if TRACE_PATH:
+        tracer.start(TRACE_PATH)
     try:
+        # Attente du modèle préchauffé avant la première frame
+        if not model_ready.is_set():
+            print("En attente du préchauffage du modèle...")
+            wait_model_ready()
+
         # Ouverture de la source vidéo
         cap = cv2.VideoCapture(video_source)
         if not cap.isOpened():
@@ -189,59 +729,263 @@ def video_processing_thread(video_source, on_object_detected=None, object_ids=No
 
         print(f"Traitement vidéo démarré - Source: {video_source}")
 
-        # Boucle principale de traitement
-        while not stop_detection:
-            if _paused:
+        # Source en direct: on jette les vieilles frames; fichier: contre-pression
+        live_source = isinstance(video_source, int)
+        capture_policy = DROP_OLDEST if live_source else BLOCK
+        sequence = [0]
+        # Heure de capture par frame, jusqu'au rendu (mesure de bout en bout)
+        captured_at = {}
+
+        # Taille de lot: 1 en direct, fixe ou auto-ajustée pour les fichiers
+        if live_source:
+            batch_size = None
+        elif FILE_BATCH_SIZE == "auto":
+            batch_size = BatchSizeTuner(max_size=MAX_BATCH_SIZE)
+        else:
+            batch_size = lambda: FILE_BATCH_SIZE
+        capture_queue_size = 2 if live_source else max(2, MAX_BATCH_SIZE)
+
+        # Suivi des objets, propre à chaque session
+        tracker = None
+        if TRACKING:
+            tracker = ByteTracker(
+                high_thresh=get_confidence_threshold(),
+                low_thresh=TRACK_LOW_THRESHOLD,
+                min_hits=TRACK_MIN_HITS
+            )
+        _tracker = tracker
+
+        # Détections brutes de la session: le filtre (seuil, classes) peut changer en cours
+        # de lecture, l'affichage est recalculé depuis ces détections
+        _detection_buffer = RawDetectionBuffer(RAW_BUFFER_FRAMES) if raw_detections else None
+        _object_filter = object_ids
+        _last_render = None
+
+        # Cache des détections (fichiers seulement: un flux direct ne se rejoue pas)
+        cache_session = None
+        if detection_cache_applies(tracker is not None) and not live_source:
+            try:
+                cache_session = get_detection_cache().session(video_source, resolve_weights(MODEL_PATH), IMAGE_SIZE, detection_cache_signature())
+            except OSError as e:
+                print(f"Cache de détections indisponible: {e}")
+
+        # Direct: changement de taille de modèle à chaud si le débit d'inférence sort de la bande
+        # (les fichiers n'ont pas de contrainte temps réel: contre-pression seulement)
+        size_controller = None
+        if live_source and MODEL_HOT_SWAP and MODEL_PATH in MODEL_CANDIDATES:
+            from model_selector import ModelSizeController
+            size_controller = ModelSizeController(
+                MODEL_CANDIDATES, MODEL_PATH, MODEL_FPS_BAND, estimates=_model_fps_estimates
+            )
+
+        # Direct: taille d'entrée ajustée à chaque détection pour tenir la latence cible
+        resolution = None
+        if live_source and ADAPTIVE_RESOLUTION:
+            resolution = ResolutionController(RESOLUTION_STEPS, TARGET_INFERENCE_LATENCY, initial=IMAGE_SIZE)
+        _resolution = resolution
+
+        # Direct: pas d'inférence sur une scène immobile
+        gate = None
+        if live_source and MOTION_GATE:
+            gate = MotionGate(MOTION_THRESHOLD, MOTION_PIXEL_DELTA, MOTION_REFRESH_FRAMES)
+        _motion_gate = gate
+        last_detection = {"detections": EMPTY_DETECTIONS, "fps": 0.0}
+
+        def record_inference_rate(fps):
+            if not fps:
+                return
+            if resolution is not None:
+                resolution.record(1 / fps)
+            if size_controller is None:
+                return
+            target = size_controller.record(fps)
+            if target is not None:
+                print(f"Débit d'inférence hors bande ({fps:.1f} FPS), passage à {target}")
+                # Le contrôleur ne change de modèle qu'une fois l'échange réussi
+                request_model_swap(target, on_done=lambda done, path=target: size_controller.confirm(path) if done else size_controller.reject(path))
+
+        # Étage 1: décodage
+        def capture_stage(_):
+            while _paused and not stop_detection:
                 time.sleep(0.1)
-                continue
+            if stop_detection:
+                return END_OF_STREAM
 
+            start = time.perf_counter()
             ret, frame = cap.read()
             if not ret:
                 print("Fin du flux vidéo")
-                break
+                return END_OF_STREAM
+            captured = time.perf_counter()
+            metrics.record("capture", captured - start)
+
+            sequence[0] += 1
+            captured_at[sequence[0]] = captured
+            return sequence[0], frame
 
-            # Analyse avec YOLO
-            processed_frame, fps, detected_count, total_detected = process_frame(
+        # Étage 2: inférence YOLO
+        def inference_stage(item):
+            seq, frame = item
+            if gate is not None and not gate.should_detect(frame):
+                return seq, frame, last_detection["detections"], last_detection["fps"], len(detected_objects_set)
+
+            detections, fps, total_detected = detect_objects(
                 frame,
-                object_ids=object_ids,
-                on_object_detected=on_object_detected
+                object_ids=_object_filter,
+                on_object_detected=on_object_detected,
+                tracker=tracker,
+                raw=raw_detections,
+                imgsz=resolution() if resolution else None
             )
+            record_inference_rate(fps)
+            last_detection.update(detections=detections, fps=fps)
+            return seq, frame, detections, fps, total_detected
 
-            # Conversion pour affichage
-            display_frame = cv2.cvtColor(processed_frame, cv2.COLOR_BGR2RGB)
+        # Étage 2 (direct): détection toutes les K frames, boîtes propagées entre deux
+        stride = StrideController(TARGET_DISPLAY_FPS, MAX_STRIDE) if live_source and ADAPTIVE_STRIDE else None
+        propagator = BoxPropagator()
+        display_rate = {"last": None, "fps": 0.0}
+        frames_since_detection = [1]
 
-            # Envoi à l'interface
-            try:
-                if frame_queue.full():
-                    frame_queue.get_nowait()
-                frame_queue.put((display_frame, fps, detected_count, total_detected), block=False)
-            except queue.Full:
-                pass
+        def strided_inference_stage(item):
+            seq, frame = item
+            start = time.perf_counter()
+
+            detect = stride.should_detect()
+            if detect and gate is not None and not gate.should_detect(frame, stride.stride):
+                # Scène immobile: boîtes courantes réutilisées, ni inférence ni flot optique
+                detections = propagator.detections.copy()
+                total_detected = len(detected_objects_set)
+                frames_since_detection[0] += 1
+            elif detect:
+                detections, detect_fps, total_detected = detect_objects(
+                    frame,
+                    object_ids=_object_filter,
+                    on_object_detected=on_object_detected,
+                    tracker=tracker,
+                    frames_elapsed=frames_since_detection[0],
+                    raw=raw_detections,
+                    imgsz=resolution() if resolution else None
+                )
+                frames_since_detection[0] = 1
+                # Seules les boîtes visibles sont propagées (le flot optique coûte par boîte)
+                propagator.reset(frame, select_detections(detections, _object_filter))
+                stride.record_detect(time.perf_counter() - start)
+                record_inference_rate(detect_fps)
+            else:
+                # Les boîtes propagées ne modifient pas detected_objects_set
+                detections = propagator.propagate(frame)
+                total_detected = len(detected_objects_set)
+                frames_since_detection[0] += 1
+                stride.record_propagate(time.perf_counter() - start)
+
+            # FPS affiché: débit réel de frames en sortie (moyenne glissante)
+            now = time.perf_counter()
+            if display_rate["last"] is not None and now > display_rate["last"]:
+                instant = 1 / (now - display_rate["last"])
+                display_rate["fps"] += 0.2 * (instant - display_rate["fps"])
+            display_rate["last"] = now
+
+            return seq, frame, detections, display_rate["fps"], total_detected
+
+        # Étage 2 (fichiers): inférence par lots, résultats rendus dans l'ordre
+        def batch_inference_stage(items):
+            start = time.perf_counter()
+            outputs = detect_objects_batch(
+                [frame for _, frame in items],
+                object_ids=_object_filter,
+                on_object_detected=on_object_detected,
+                tracker=tracker,
+                cache_session=cache_session,
+                frame_indices=[seq - 1 for seq, _ in items],
+                raw=raw_detections
+            )
+            if isinstance(batch_size, BatchSizeTuner):
+                batch_size.record(len(items), time.perf_counter() - start)
+            return [
+                (seq, frame, detections, fps, total_detected)
+                for (seq, frame), (detections, fps, total_detected) in zip(items, outputs)
+            ]
+
+        # Étage 3: annotation et conversion pour affichage
+        def render_stage(item):
+            global _last_render
+            seq, frame, detections, fps, total_detected = item
+            if _detection_buffer is not None:
+                _detection_buffer.add(seq, detections)
+            _last_render = (frame, detections, fps, total_detected)
+            # Les frames jetées à la capture n'arrivent jamais ici: on oublie leur heure
+            for old in [k for k in captured_at if k < seq]:
+                del captured_at[old]
+            return render_display_frame(frame, detections, fps, total_detected, seq, captured_at.pop(seq, None))
+
+        pipeline = VideoPipeline(lambda: stop_detection)
+        pipeline.add_stage("capture", capture_stage, StageQueue("capture", maxsize=capture_queue_size, policy=capture_policy))
+        if stride is not None:
+            pipeline.add_stage("inference", strided_inference_stage, StageQueue("inference", maxsize=2, policy=BLOCK))
+        elif batch_size is None:
+            pipeline.add_stage("inference", inference_stage, StageQueue("inference", maxsize=2, policy=BLOCK))
+        else:
+            pipeline.add_stage("inference", batch_inference_stage, StageQueue("inference", maxsize=2, policy=BLOCK), batch_size=batch_size)
+        pipeline.add_stage("render", render_stage, StageQueue("ui", policy=DROP_OLDEST, q=frame_queue, forward_end=False, on_put=_frame_ready.set))
+        _pipeline = pipeline
+
+        # Décodage de la frame N+1 pendant l'inférence de la frame N
+        pipeline.start()
+        pipeline.join()
 
         # Libération des ressources
         cap.release()
-        print("Traitement vidéo terminé")
+        pipeline.report()
+        if cache_session is not None:
+            cache_session.close()
+            stats = get_cache_stats()
+            print(f"Cache de détections: {stats['hits']} trouvées, {stats['misses']} calculées")
+        if tracker is not None:
+            print(f"Objets distincts suivis: {tracker.total_confirmed}")
+        if stride is not None:
+            print(f"Pas de détection final: 1 frame sur {stride.stride}")
+        if resolution is not None:
+            print(f"Taille d'entrée finale: {resolution()} px")
+        if gate is not None:
+            print(f"Inférences évitées (scène immobile): {gate.stats()['skipped_pct']:.1f}%")
+        failure = pipeline.error()
+        if failure is not None:
+            name, error = failure
+            print(f"Traitement vidéo interrompu par une erreur (étage {name}): {error}")
+        else:
+            print("Traitement vidéo terminé")
 
     except Exception as e:
         print(f"Erreur dans le thread de traitement vidéo: {e}")
     finally:
         if 'cap' in locals() and cap.isOpened():
             cap.release()
+        if tracer.enabled:
+            try:
+                print(f"Trace écrite: {tracer.stop()}")
+            except OSError as e:
+                print(f"Trace non écrite: {e}")
 
-def process_video(video_source, canvas, window, detection_label=None, fps_label=None, progress=None, objects_to_detect=None, on_object_detected=None):
-    global stop_detection, _paused, detection_thread, detected_objects_set
+def process_video(video_source, canvas, window, detection_label=None, fps_label=None, progress=None, objects_to_detect=None, on_object_detected=None, resolution_label=None, raw_detections=False):
+    global stop_detection, _paused, detection_thread, detected_objects_set, _last_render, _display_threshold, _ui_session
 
     # Réinitialisation des variables de contrôle
     with processing_lock:
         stop_detection = False
         _paused = False
         detected_objects_set = set()
+        _last_render = None
+        _display_threshold = None
+        # Le relais d'une session précédente s'arrête
+        _ui_session += 1
+    metrics.window = METRICS_WINDOW
+    metrics.reset()
 
     # Conversion des noms d'objets en IDs
     object_ids = None
     if objects_to_detect:
-        name_to_id = {v: k for k, v in model.names.items()}
-        object_ids = [name_to_id[obj] for obj in objects_to_detect if obj in name_to_id]
+        object_ids = [COCO_NAME_TO_ID[obj] for obj in objects_to_detect if obj in COCO_NAME_TO_ID]
 
     # Arrêt du thread existant si nécessaire
     if detection_thread and detection_thread.is_alive():
@@ -258,75 +1002,145 @@ def process_video(video_source, canvas, window, detection_label=None, fps_label=
 
     # Suivi de l'état d'affichage du message de victoire
     victory_shown = [False]
+    _frame_ready.clear()
 
     # Démarrage du thread de traitement
     detection_thread = threading.Thread(
         target=video_processing_thread,
-        args=(video_source, on_object_detected, object_ids),
+        args=(video_source, on_object_detected, object_ids, raw_detections),
         daemon=True
     )
     detection_thread.start()
 
+    # Un seul élément image dans le canvas, centré, repris d'une session à l'autre (sinon
+    # chaque vidéo en empilerait un de plus); la taille du canvas est suivie par <Configure>
+    # (le thread de rendu y ajuste les frames) au lieu d'être lue à chaque frame
+    set_display_size(int(canvas.cget("width")), int(canvas.cget("height")))
+    center = (int(canvas.cget("width")) // 2, int(canvas.cget("height")) // 2)
+    items = canvas.find_withtag("video_frame")
+    if items:
+        item = items[0]
+        canvas.coords(item, *center)
+        canvas.itemconfig(item, image="")
+    else:
+        item = canvas.create_image(*center, anchor=tk.CENTER, tags="video_frame")
+    display = {"image": None, "item": item}
+
+    def on_canvas_configure(event):
+        set_display_size(event.width, event.height)
+        canvas.coords(display["item"], event.width // 2, event.height // 2)
+
+    canvas.bind("<Configure>", on_canvas_configure)
+
+    ui_state = {"last_paint": 0.0, "scheduled": False, "labels_at": 0.0}
+    min_interval = 1 / DISPLAY_MAX_FPS
+
+    # Réveil de la boucle Tk: le thread de rendu signale _frame_ready, un thread relais
+    # le transforme en événement virtuel <<FrameReady>> (les réveils rapprochés sont
+    # fusionnés). Le rendu n'appelle jamais Tk lui-même: il ne bloque pas sur la boucle Tk
+    def on_frame_ready(_event=None):
+        if stop_detection or ui_state["scheduled"]:
+            return
+        # Au plus une mise à jour par rafraîchissement de l'écran
+        wait = ui_state["last_paint"] + min_interval - time.perf_counter()
+        ui_state["scheduled"] = True
+        window.after(max(0, int(wait * 1000)), update_ui)
+
+    def relay_frames(session):
+        # Actif jusqu'à l'arrêt de la session, pas seulement jusqu'à la fin du décodage:
+        # après la dernière frame d'un fichier, refresh_display() (seuil, classes) redessine encore
+        while not stop_detection and _ui_session == session:
+            if not _frame_ready.wait(0.5):
+                continue
+            if _ui_session != session:
+                # Réveil destiné à la session suivante
+                return
+            _frame_ready.clear()
+            try:
+                window.event_generate("<<FrameReady>>", when="tail")
+            except RuntimeError:
+                # Boucle Tk momentanément hors de mainloop: nouvel essai
+                _frame_ready.set()
+            except tk.TclError:
+                # Fenêtre fermée
+                return
+
     # Fonction de mise à jour de l'interface
     def update_ui():
+        ui_state["scheduled"] = False
         if stop_detection or not canvas.winfo_exists():
             return
 
         try:
             if not frame_queue.empty():
-                display_frame, fps, detected_count, total_detected = frame_queue.get_nowait()
+                display_frame, fps, detected_count, total_detected, (seq, captured, rendered) = frame_queue.get_nowait()
+                dequeued = time.perf_counter()
+                ui_state["last_paint"] = dequeued
+                metrics.record("queue_wait", dequeued - rendered)
 
-                # Redimensionnement pour l'affichage
+                # Frame déjà à la taille du canvas (réduite par le thread de rendu):
+                # l'image Tk existante est mise à jour en place
                 pil_img = Image.fromarray(display_frame)
-                img_width, img_height = pil_img.size
-                canvas_width = canvas.winfo_width()
-                canvas_height = canvas.winfo_height()
-
-                if canvas_width > 1 and canvas_height > 1:
-                    ratio = min(canvas_width/img_width, canvas_height/img_height)
-                    new_width = int(img_width * ratio)
-                    new_height = int(img_height * ratio)
-                    pil_img = pil_img.resize((new_width, new_height), Image.LANCZOS)
-
-                # Affichage dans le canvas
-                tk_img = ImageTk.PhotoImage(pil_img)
-                canvas.delete("all")
-                canvas.create_image(
-                    canvas_width//2 if canvas_width > 1 else 0,
-                    canvas_height//2 if canvas_height > 1 else 0,
-                    anchor=tk.CENTER,
-                    image=tk_img
-                )
-                canvas.image = tk_img
+                tk_img = display["image"]
+                if tk_img is None or (tk_img.width(), tk_img.height()) != pil_img.size:
+                    tk_img = ImageTk.PhotoImage(pil_img)
+                    display["image"] = tk_img
+                    canvas.itemconfig(display["item"], image=tk_img)
+                    canvas.image = tk_img
+                else:
+                    tk_img.paste(pil_img)
+                painted = time.perf_counter()
+                metrics.record("paint", painted - dequeued)
+                if tracer.enabled:
+                    tracer.complete("paint", dequeued, painted, seq=seq)
+                if captured is not None:
+                    metrics.record("end_to_end", painted - captured)
+                metrics.tick("display")
 
-                # Mise à jour des informations
-                if fps_label and fps_label.winfo_exists():
-                    fps_label.config(text=f"FPS: {fps:.2f}")
+                # Vérification de la victoire
+                victory = object_ids and not victory_shown[0] and total_detected >= len(object_ids)
 
-                if detection_label and detection_label.winfo_exists():
-                    if objects_to_detect:
-                        detection_label.config(text=f"Objets détectés: {total_detected}/{len(object_ids)}")
-                    else:
-                        detection_label.config(text=f"Objets détectés: {detected_count}")
+                # Mise à jour des informations, quelques fois par seconde seulement
+                # (FPS: frames réellement affichées)
+                if victory or painted - ui_state["labels_at"] >= LABEL_REFRESH_INTERVAL:
+                    ui_state["labels_at"] = painted
+                    if fps_label and fps_label.winfo_exists():
+                        fps_label.config(text=f"FPS: {metrics.rate('display') or fps:.2f}")
+                    if resolution_label and resolution_label.winfo_exists():
+                        resolution_label.config(text=f"Entrée: {get_inference_size()} px")
 
-                # Vérification de la victoire
-                if object_ids and not victory_shown[0] and total_detected >= len(object_ids):
+                    if detection_label and detection_label.winfo_exists():
+                        if objects_to_detect:
+                            detection_label.config(text=f"Objets détectés: {total_detected}/{len(object_ids)}")
+                        else:
+                            detection_label.config(text=f"Objets détectés: {detected_count}")
+
+                if victory:
                     victory_shown[0] = True
                     with processing_lock:
-                        detected_names = [model.names[obj_id] for obj_id in detected_objects_set if obj_id in model.names]
+                        detected_names = [COCO_CLASSES[obj_id] for obj_id in detected_objects_set if obj_id in COCO_CLASSES]
                     window.after(100, lambda: show_victory_message(window, detected_names))
 
-            # Planification de la prochaine mise à jour
-            if not stop_detection and window.winfo_exists():
-                window.after(10, update_ui)
+                if tracer.enabled:
+                    tracer.complete("update_ui", dequeued, time.perf_counter(), seq=seq)
 
         except Exception as e:
-            print(f"Erreur dans update_ui: {e}")
-            if not stop_detection and window.winfo_exists():
-                window.after(10, update_ui)
+            log.error("update_ui", "Erreur dans update_ui", erreur=str(e))
+
+        if not event_driven and not stop_detection and window.winfo_exists():
+            # Tcl sans threads: pas d'événement possible depuis un autre thread, on
+            # interroge la file au rythme de l'écran
+            ui_state["scheduled"] = True
+            window.after(int(min_interval * 1000), update_ui)
 
     # Démarrage de la mise à jour UI
-    window.after(10, update_ui)
+    event_driven = bool(window.tk.call("info", "exists", "tcl_platform(threaded)"))
+    if event_driven:
+        window.bind("<<FrameReady>>", on_frame_ready)
+        threading.Thread(target=relay_frames, args=(_ui_session,), daemon=True).start()
+    else:
+        ui_state["scheduled"] = True
+        window.after(int(min_interval * 1000), update_ui)
 
     # Gestion de la fermeture de fenêtre
     def on_window_close():